@@ -1,4 +1,8 @@
 import os
+import sys
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,72 +21,91 @@ STEAM_WORKSHOP_BASE_URL = "https://steamcommunity.com/sharedfiles/filedetails/?i
 STEAM_API_BASE_URL = "https://api.steampowered.com/ISteamRemoteStorage/GetPublishedFileDetails/v1/"
 
 # CDLC and Compat Mods Configuration
-CDLC_COMPAT_MODS = {
-    "GM": {
-        "name": "Global Mobilization - Cold War Germany",
-        "required_mods": [1808728802],  # Global Mobilization CDLC mod ID
-        "compat_mod": 1776428269,
-        "compat_name": "Global Mobilization - Cold War Germany Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=1776428269",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=1776428269"
-    },
-    "SOG": {
-        "name": "S.O.G. Prairie Fire",
-        "required_mods": [1224892496],  # S.O.G. Prairie Fire CDLC mod ID
-        "compat_mod": 2477276806,
-        "compat_name": "S.O.G. Prairie Fire Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2477276806",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2477276806"
-    },
-    "CSLA": {
-        "name": "CSLA Iron Curtain",
-        "required_mods": [1294443683],  # CSLA Iron Curtain CDLC mod ID
-        "compat_mod": 2503886780,
-        "compat_name": "CSLA Iron Curtain Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2503886780",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2503886780"
-    },
-    "SPE": {
-        "name": "Spearhead 1944",
-        "required_mods": [1873244913],  # Spearhead 1944 CDLC mod ID
-        "compat_mod": 2991828484,
-        "compat_name": "Spearhead 1944 Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2991828484",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2991828484"
-    },
-    "WS": {
-        "name": "Western Sahara",
-        "required_mods": [1681170],  # Western Sahara CDLC mod ID
-        "compat_mod": 2636962953,
-        "compat_name": "Western Sahara Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2636962953",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=2636962953"
-    },
-    "RF": {
-        "name": "Reaction Forces",
-        "required_mods": [2017047000],  # Reaction Forces CDLC mod ID
-        "compat_mod": 3150497912,
-        "compat_name": "Reaction Forces Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=3150497912",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=3150497912"
-    },
-    "EF": {
-        "name": "Expeditionary Forces",
-        "required_mods": [2017047001],  # Expeditionary Forces CDLC mod ID
-        "compat_mod": 3348605126,
-        "compat_name": "Expeditionary Forces Compatibility Data",
-        "steam_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=3348605126",
-        "cdlc_url": "https://steamcommunity.com/sharedfiles/filedetails/?id=3348605126"
-    }
-}
+@dataclass(frozen=True, slots=True)
+class CdlcEntry:
+    name: str
+    required_mods: Tuple[int, ...]
+    compat_mod: int
+    compat_name: str
+    cdlc_url: str
+    # Workshop page of the compat mod, derived from compat_mod
+    steam_url: str = field(init=False)
+    
+    def __post_init__(self):
+        # Interned so entries pointing at the same page share one string
+        object.__setattr__(self, 'steam_url', sys.intern(f"{STEAM_WORKSHOP_BASE_URL}{self.compat_mod}"))
+        object.__setattr__(self, 'cdlc_url', sys.intern(self.cdlc_url))
+
+CDLC_COMPAT_MODS: Mapping[str, CdlcEntry] = MappingProxyType({
+    "GM": CdlcEntry(
+        name="Global Mobilization - Cold War Germany",
+        required_mods=(1808728802,),  # Global Mobilization CDLC mod ID
+        compat_mod=1776428269,
+        compat_name="Global Mobilization - Cold War Germany Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=1776428269"
+    ),
+    "SOG": CdlcEntry(
+        name="S.O.G. Prairie Fire",
+        required_mods=(1224892496,),  # S.O.G. Prairie Fire CDLC mod ID
+        compat_mod=2477276806,
+        compat_name="S.O.G. Prairie Fire Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=2477276806"
+    ),
+    "CSLA": CdlcEntry(
+        name="CSLA Iron Curtain",
+        required_mods=(1294443683,),  # CSLA Iron Curtain CDLC mod ID
+        compat_mod=2503886780,
+        compat_name="CSLA Iron Curtain Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=2503886780"
+    ),
+    "SPE": CdlcEntry(
+        name="Spearhead 1944",
+        required_mods=(1873244913,),  # Spearhead 1944 CDLC mod ID
+        compat_mod=2991828484,
+        compat_name="Spearhead 1944 Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=2991828484"
+    ),
+    "WS": CdlcEntry(
+        name="Western Sahara",
+        required_mods=(1681170,),  # Western Sahara CDLC mod ID
+        compat_mod=2636962953,
+        compat_name="Western Sahara Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=2636962953"
+    ),
+    "RF": CdlcEntry(
+        name="Reaction Forces",
+        required_mods=(2017047000,),  # Reaction Forces CDLC mod ID
+        compat_mod=3150497912,
+        compat_name="Reaction Forces Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=3150497912"
+    ),
+    "EF": CdlcEntry(
+        name="Expeditionary Forces",
+        required_mods=(2017047001,),  # Expeditionary Forces CDLC mod ID
+        compat_mod=3348605126,
+        compat_name="Expeditionary Forces Compatibility Data",
+        cdlc_url="https://steamcommunity.com/sharedfiles/filedetails/?id=3348605126"
+    )
+})
+
+# Reverse lookups from workshop mod ID to CDLC key
+COMPAT_MOD_TO_KEY: Mapping[int, str] = MappingProxyType({
+    entry.compat_mod: key for key, entry in CDLC_COMPAT_MODS.items()
+})
+REQUIRED_MOD_TO_KEY: Mapping[int, str] = MappingProxyType({
+    mod_id: key for key, entry in CDLC_COMPAT_MODS.items() for mod_id in entry.required_mods
+})
+CDLC_COMPAT_BY_NAME: Mapping[str, CdlcEntry] = MappingProxyType({
+    entry.name: entry for entry in CDLC_COMPAT_MODS.values()
+})
 
 # Known Mod Sizes (in GB) - will be cached and updated
 KNOWN_MOD_SIZES = {
     # Example mod sizes
-    "123456789": 1.2,
-    "987654321": 0.8,
-    "234567890": 2.1,
-    "876543210": 1.5,
+    123456789: 1.2,
+    987654321: 0.8,
+    234567890: 2.1,
+    876543210: 1.5,
 }
 
 # Bot Settings
@@ -1,298 +1,819 @@
+import asyncio
+import functools
 import sqlite3
 import json
-import time
-from typing import List, Dict, Optional, Tuple
+import struct
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(value) -> bytes:
+    """Serialize a mod list to JSON bytes for a BLOB column"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def _loads(data):
+    """Deserialize a mod list stored as JSON bytes (or TEXT from older rows)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _pack_ids(mod_ids: List[str]) -> bytes:
+    """Pack workshop IDs as little-endian uint64s (8 bytes per ID)"""
+    return struct.pack(f"<{len(mod_ids)}Q", *map(int, mod_ids))
+
+
+def _unpack_ids(blob: bytes) -> List[str]:
+    """Unpack IDs written by _pack_ids back into the string form callers compare against"""
+    return [str(mod_id) for mod_id in struct.unpack(f"<{len(blob) // 8}Q", blob)]
+
+
+# Preset dictionary for compressing stored mod lists: the keys and URL prefix every
+# entry repeats. Never change these bytes, existing rows need them to decompress.
+_MODS_ZDICT = (
+    b'"required_items":[],"dlc_requirements":[]},'
+    b'{"id":"","name":"","size_gb":null,"url":"https://steamcommunity.com/sharedfiles/filedetails/?id='
+)
+
+
+def _pack_mods(mods: List[Dict]) -> bytes:
+    """Serialize and zlib-compress a mod list with the preset dictionary"""
+    compressor = zlib.compressobj(zdict=_MODS_ZDICT)
+    return compressor.compress(_dumps(mods)) + compressor.flush()
+
+
+def _unpack_mods(blob: bytes) -> List[Dict]:
+    """Decompress and deserialize a mod list written by _pack_mods"""
+    decompressor = zlib.decompressobj(zdict=_MODS_ZDICT)
+    return _loads(decompressor.decompress(blob) + decompressor.flush())
+
+
+def _summarize_mods(mods: List[Dict]) -> Tuple[int, float]:
+    """Return (mods_count, total_size_gb) for a stored mod list"""
+    return len(mods), sum(mod.get('size_gb') or 0 for mod in mods)
+
+
+def _split_statements(script: str) -> List[str]:
+    """Split an SQL script into its statements, for running them without executescript"""
+    statements = []
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            statements.append(statement)
+            statement = ''
+    return statements
+
+
+# Statement text is kept in module constants so every call hands sqlite3 the
+# same string and hits the connection's prepared-statement cache.
+
+# Current Unix time, computed by SQLite so writers never bind a timestamp
+_SQL_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+# Sizes are stored as INTEGER bytes and converted to and from GB (GiB) inside the statements
+_SQL_GB_PARAM = "CAST(ROUND(? * 1073741824) AS INTEGER)"
+
+
+def _sql_as_gb(column: str) -> str:
+    """SQL reading an INTEGER bytes column back as GB, rounded so 1.2 GB reads as 1.2"""
+    return f"ROUND({column} / 1073741824.0, 6)"
+
+
+_SQL_CACHE_MOD_INFO = f'''
+    INSERT INTO mod_cache (mod_id, mod_name, mod_size_bytes, last_updated)
+    VALUES (?, ?, {_SQL_GB_PARAM}, {_SQL_NOW})
+    ON CONFLICT(mod_id) DO UPDATE SET
+        mod_name = excluded.mod_name,
+        -- An unknown (NULL) size never overwrites a size we already know
+        mod_size_bytes = COALESCE(excluded.mod_size_bytes, mod_size_bytes),
+        last_updated = excluded.last_updated
+    -- Re-seeing an unchanged mod skips the write, but still refreshes once a day so cleanup keeps it
+    WHERE mod_name IS NOT excluded.mod_name
+        OR mod_size_bytes IS NOT COALESCE(excluded.mod_size_bytes, mod_size_bytes)
+        OR last_updated < excluded.last_updated - 86400
+'''
+_SQL_GET_MOD_INFO = f'''
+    SELECT mod_name, {_sql_as_gb('mod_size_bytes')} AS mod_size, last_updated FROM mod_cache
+    WHERE mod_id = ?
+'''
+# The ID list is bound as one JSON array so every batch size shares this one statement
+_SQL_GET_MOD_INFOS = f'''
+    SELECT mod_id, mod_name, {_sql_as_gb('mod_size_bytes')} AS mod_size, last_updated FROM mod_cache
+    WHERE mod_id IN (SELECT value FROM json_each(?))
+'''
+_SQL_SAVE_USER_UPLOAD = f'''
+    INSERT INTO user_uploads (user_id, server_id, upload_time, total_size_bytes)
+    VALUES (?, ?, {_SQL_NOW}, {_SQL_GB_PARAM})
+'''
+_SQL_SAVE_UPLOAD_MOD = "INSERT INTO upload_mods (upload_id, position, mod_id) VALUES (?, ?, ?)"
+_SQL_GET_LAST_UPLOAD = f'''
+    SELECT {_sql_as_gb('u.total_size_bytes')} AS total_size, u.upload_time, m.mod_id
+    FROM (
+        SELECT id, total_size_bytes, upload_time FROM user_uploads
+        WHERE user_id = ? AND server_id = ?
+        ORDER BY upload_time DESC, id DESC
+        LIMIT 1
+    ) AS u
+    LEFT JOIN upload_mods AS m ON m.upload_id = u.id
+    ORDER BY m.position
+'''
+_SQL_SAVE_MOD_SIZE = f'''
+    INSERT INTO mod_cache (mod_id, mod_size_bytes, last_updated)
+    VALUES (?, {_SQL_GB_PARAM}, {_SQL_NOW})
+    ON CONFLICT(mod_id) DO UPDATE SET
+        mod_size_bytes = excluded.mod_size_bytes,
+        last_updated = excluded.last_updated
+    WHERE mod_size_bytes IS NOT excluded.mod_size_bytes
+        OR last_updated < excluded.last_updated - 86400
+'''
+_SQL_SAVE_BOT_MESSAGE = f'''
+    INSERT INTO bot_messages (channel_id, message_id, user_id, server_id, message_type, created_time)
+    VALUES (?, ?, ?, ?, ?, {_SQL_NOW})
+'''
+_SQL_GET_BOT_MESSAGES = '''
+    SELECT message_id, user_id FROM bot_messages
+    WHERE channel_id = ? AND message_type = ?
+    ORDER BY created_time DESC
+'''
+_SQL_DELETE_BOT_MESSAGE = "DELETE FROM bot_messages WHERE message_id = ?"
+_SQL_CLEANUP_BOT_MESSAGES = f"DELETE FROM bot_messages WHERE created_time < {_SQL_NOW} - ?"
+_SQL_CLEANUP_MOD_CACHE = f"DELETE FROM mod_cache WHERE last_updated < {_SQL_NOW} - ?"
+_SQL_SAVE_ACTIVE_MOD_LIST = f'''
+    INSERT INTO active_mod_lists
+    (list_id, user_id, guild_id, mods, download_url, timestamp, mods_count, total_size_bytes, html)
+    VALUES (?, ?, ?, ?, ?, {_SQL_NOW}, ?, {_SQL_GB_PARAM}, ?)
+    ON CONFLICT(list_id) DO UPDATE SET
+        user_id = excluded.user_id,
+        guild_id = excluded.guild_id,
+        mods = excluded.mods,
+        download_url = excluded.download_url,
+        mods_count = excluded.mods_count,
+        total_size_bytes = excluded.total_size_bytes,
+        timestamp = excluded.timestamp,
+        html = excluded.html
+'''
+_SQL_GET_MOD_LIST_HTML = "SELECT html FROM active_mod_lists WHERE list_id = ?"
+_SQL_GET_ACTIVE_MOD_LIST = '''
+    SELECT user_id, guild_id, mods, download_url, timestamp
+    FROM active_mod_lists
+    WHERE list_id = ?
+'''
+_SQL_GET_RECENT_MOD_LIST = '''
+    SELECT list_id, user_id, guild_id, mods, download_url, timestamp
+    FROM active_mod_lists
+    WHERE user_id = ? AND (guild_id = ? OR guild_id IS NULL)
+    ORDER BY timestamp DESC
+    LIMIT 1
+'''
+_SQL_GET_RECENT_MOD_LIST_SUMMARY = f'''
+    SELECT list_id, mods_count, {_sql_as_gb('total_size_bytes')} AS total_size_gb, timestamp
+    FROM active_mod_lists
+    WHERE user_id = ? AND (guild_id = ? OR guild_id IS NULL)
+    ORDER BY timestamp DESC
+    LIMIT 1
+'''
+_SQL_CLEANUP_MOD_LISTS = f"DELETE FROM active_mod_lists WHERE timestamp < {_SQL_NOW} - ?"
+_SQL_REFRESH_MOD_LIST = f'''
+    UPDATE active_mod_lists
+    SET timestamp = {_SQL_NOW}
+    WHERE list_id = ?
+'''
+
+# Full schema for a new database. Existing databases reach it through _migrate, so
+# any change here needs a SCHEMA_VERSION bump and a matching migration step.
+_SQL_SCHEMA = '''
+    -- Mod names and sizes; NULL mod_size_bytes means unknown
+    CREATE TABLE IF NOT EXISTS mod_cache (
+        mod_id INTEGER PRIMARY KEY,
+        mod_name TEXT,
+        mod_size_bytes INTEGER,
+        last_updated INTEGER
+    );
+    
+    -- User uploads
+    CREATE TABLE IF NOT EXISTS user_uploads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        server_id TEXT,
+        upload_time INTEGER,
+        total_size_bytes INTEGER
+    );
+    
+    -- One row per mod in an upload, in upload order
+    CREATE TABLE IF NOT EXISTS upload_mods (
+        upload_id INTEGER,
+        position INTEGER,
+        mod_id INTEGER,
+        PRIMARY KEY (upload_id, position)
+    ) WITHOUT ROWID;
+    
+    -- Bot message IDs for cleanup
+    CREATE TABLE IF NOT EXISTS bot_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel_id TEXT,
+        message_id TEXT,
+        user_id TEXT,
+        server_id TEXT,
+        message_type TEXT,
+        created_time INTEGER
+    );
+    
+    -- Active mod lists behind the message buttons
+    CREATE TABLE IF NOT EXISTS active_mod_lists (
+        list_id TEXT PRIMARY KEY,
+        user_id TEXT,
+        guild_id TEXT,
+        mods BLOB,
+        download_url TEXT,
+        timestamp INTEGER,
+        mods_count INTEGER,
+        total_size_bytes INTEGER,
+        -- zlib-compressed copy of the uploaded HTML file; NULL when it was not kept
+        html BLOB
+    );
+    
+    -- Indexes for the per-user and per-channel "most recent" lookups
+    CREATE INDEX IF NOT EXISTS idx_uploads_user_server_time
+    ON user_uploads(user_id, server_id, upload_time DESC);
+    CREATE INDEX IF NOT EXISTS idx_upload_mods_mod
+    ON upload_mods(mod_id);
+    CREATE INDEX IF NOT EXISTS idx_botmsgs_chan_type_time
+    ON bot_messages(channel_id, message_type, created_time DESC);
+    CREATE INDEX IF NOT EXISTS idx_mlists_user_guild_ts
+    ON active_mod_lists(user_id, guild_id, timestamp DESC);
+    
+    -- Let the cleanups range-scan expired rows instead of walking each table
+    CREATE INDEX IF NOT EXISTS idx_mod_cache_updated
+    ON mod_cache(last_updated);
+    CREATE INDEX IF NOT EXISTS idx_mlists_ts
+    ON active_mod_lists(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_botmsgs_created
+    ON bot_messages(created_time);
+'''
+
+# The schema split into single statements, so it can run inside an open transaction
+_SQL_SCHEMA_STATEMENTS = _split_statements(_SQL_SCHEMA)
+
+# Number of prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+# SQLite page cache per connection, in KiB (negative cache_size means KiB, not pages)
+PAGE_CACHE_KIB = 64000
+
+# Database page size for newly created files, and how much of the file reads may memory-map
+PAGE_SIZE = 8192
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Most-recently-used mod_cache rows kept in memory
+MOD_CACHE_MEMORY_SIZE = 4096
+
+# Stored in PRAGMA user_version; bump it and add a step to _migrate when the schema changes
+SCHEMA_VERSION = 9
+
+# Worker threads for blocking database calls from the bot. Each one keeps its own reader
+# connection with its own page cache, so the pool is kept small rather than sharing
+# asyncio's default executor
+DB_WORKERS = 3
+
+
+def _in_executor(method):
+    """Make an async variant of a blocking ModDatabase method that runs it via ModDatabase.run"""
+    @functools.wraps(method)
+    async def variant(self, *args, **kwargs):
+        return await self.run(method, self, *args, **kwargs)
+    variant.__name__ = f"{method.__name__}_async"
+    variant.__qualname__ = f"{method.__qualname__}_async"
+    variant.__doc__ = f"{method.__doc__} (without blocking the event loop)"
+    return variant
+
 
 class ModDatabase:
     def __init__(self, db_path: str = "arma_mods.db"):
         self.db_path = db_path
+        # One long-lived writer connection in autocommit mode; reads go through _reader()
+        self.conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        # Rows are indexable by column name as well as position
+        self.conn.row_factory = sqlite3.Row
+        # Serializes writes when the database is used from more than one thread
+        self._lock = threading.Lock()
+        # Write-behind queue of (sql, params) for writes nobody waits on
+        self._write_queue = deque()
+        # LRU of mod_id -> (mod_name, mod_size, last_updated), invalidated on every mod_cache write
+        self._mod_rows = OrderedDict()
+        self._mod_rows_lock = threading.Lock()
+        # Bumped by every invalidation, so a row read before a write is never cached after it
+        self._mod_rows_generation = 0
+        # Per-thread read-only connections, so reads in one thread never wait on another
+        self._readers = threading.local()
+        self._reader_conns = []
+        self._executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
         self.init_database()
     
     def init_database(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        # page_size only takes effect on a new database, before it switches to WAL
+        self.conn.executescript(f'''
+            PRAGMA page_size={PAGE_SIZE};
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-{PAGE_CACHE_KIB};
+            PRAGMA mmap_size={MMAP_SIZE};
+        ''')
+        
+        with self._lock:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
             
-            # Table for storing mod information cache
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS mod_cache (
-                    mod_id TEXT PRIMARY KEY,
+            # Migrate, create anything missing and record the version in one transaction.
+            # The version is read again under the write lock, so a concurrent start that
+            # got there first is seen here, and a crash leaves the old version intact
+            with self._txn():
+                version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= SCHEMA_VERSION:
+                    return
+                
+                table_count = self.conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+                if table_count:
+                    self._migrate(version)
+                
+                # executescript would commit first, so the schema runs one statement at a time
+                for statement in _SQL_SCHEMA_STATEMENTS:
+                    self.conn.execute(statement)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    @contextmanager
+    def _txn(self):
+        """Run a block of writer statements as one IMMEDIATE transaction; callers hold _lock"""
+        # IMMEDIATE takes the write lock up front instead of upgrading mid-transaction
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+    
+    def _migrate(self, version: int):
+        """Upgrade an existing database from an older schema version; runs inside init_database's transaction"""
+        if version < 1:
+            # mod_id moves from TEXT to INTEGER PRIMARY KEY so it aliases the rowid
+            self.conn.execute("ALTER TABLE mod_cache RENAME TO mod_cache_old")
+            self.conn.execute('''
+                CREATE TABLE mod_cache (
+                    mod_id INTEGER PRIMARY KEY,
                     mod_name TEXT,
                     mod_size REAL,
                     last_updated INTEGER
                 )
             ''')
-            
-            # Table for storing user uploads
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_uploads (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT,
-                    server_id TEXT,
-                    upload_time INTEGER,
-                    mod_list TEXT,
-                    total_size REAL
-                )
+            self.conn.execute('''
+                INSERT OR REPLACE INTO mod_cache (mod_id, mod_name, mod_size, last_updated)
+                SELECT CAST(mod_id AS INTEGER), mod_name, mod_size, last_updated FROM mod_cache_old
             ''')
+            self.conn.execute("DROP TABLE mod_cache_old")
             
-            # Table for storing mod size estimates
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS mod_sizes (
-                    mod_id TEXT PRIMARY KEY,
+            self.conn.execute("ALTER TABLE mod_sizes RENAME TO mod_sizes_old")
+            self.conn.execute('''
+                CREATE TABLE mod_sizes (
+                    mod_id INTEGER PRIMARY KEY,
                     size_gb REAL,
                     last_updated INTEGER
                 )
             ''')
-            
-            # Table for storing bot message IDs for cleanup
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bot_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    channel_id TEXT,
-                    message_id TEXT,
-                    user_id TEXT,
-                    server_id TEXT,
-                    message_type TEXT,
-                    created_time INTEGER
-                )
+            self.conn.execute('''
+                INSERT OR REPLACE INTO mod_sizes (mod_id, size_gb, last_updated)
+                SELECT CAST(mod_id AS INTEGER), size_gb, last_updated FROM mod_sizes_old
             ''')
-            
-            # Table for storing active mod lists
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS active_mod_lists (
-                    list_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    guild_id TEXT,
-                    mods TEXT,
-                    download_url TEXT,
-                    timestamp INTEGER
-                )
+            self.conn.execute("DROP TABLE mod_sizes_old")
+        
+        if version < 2:
+            # mod_sizes is folded into mod_cache, and unknown sizes become NULL instead of 0
+            self.conn.execute("UPDATE mod_cache SET mod_size = NULL WHERE mod_size = 0")
+            self.conn.execute('''
+                INSERT INTO mod_cache (mod_id, mod_size, last_updated)
+                SELECT mod_id, size_gb, last_updated FROM mod_sizes WHERE true
+                ON CONFLICT(mod_id) DO UPDATE SET
+                    mod_size = excluded.mod_size,
+                    last_updated = MAX(last_updated, excluded.last_updated)
             ''')
-            
-            conn.commit()
+            self.conn.execute("DROP TABLE mod_sizes")
+        
+        if version < 3:
+            # user_uploads.mod_list moves from JSON to packed uint64 IDs
+            rows = self.conn.execute("SELECT id, mod_list FROM user_uploads").fetchall()
+            self.conn.executemany(
+                "UPDATE user_uploads SET mod_list = ? WHERE id = ?",
+                [(_pack_ids(_loads(mod_list)), upload_id) for upload_id, mod_list in rows]
+            )
+        
+        if version < 4:
+            # Summary columns so callers that only need counts never read the mods blob
+            self.conn.execute("ALTER TABLE active_mod_lists ADD COLUMN mods_count INTEGER")
+            self.conn.execute("ALTER TABLE active_mod_lists ADD COLUMN total_size_gb REAL")
+            rows = self.conn.execute("SELECT list_id, mods FROM active_mod_lists").fetchall()
+            self.conn.executemany(
+                "UPDATE active_mod_lists SET mods_count = ?, total_size_gb = ? WHERE list_id = ?",
+                [(*_summarize_mods(_loads(mods)), list_id) for list_id, mods in rows]
+            )
+        
+        if version < 5:
+            # active_mod_lists.mods moves from plain JSON to dictionary-compressed JSON
+            rows = self.conn.execute("SELECT list_id, mods FROM active_mod_lists").fetchall()
+            self.conn.executemany(
+                "UPDATE active_mod_lists SET mods = ? WHERE list_id = ?",
+                [(_pack_mods(_loads(mods)), list_id) for list_id, mods in rows]
+            )
+        
+        if version < 6:
+            # user_uploads.mod_list moves out into the upload_mods junction table
+            self.conn.execute('''
+                CREATE TABLE upload_mods (
+                    upload_id INTEGER,
+                    position INTEGER,
+                    mod_id INTEGER,
+                    PRIMARY KEY (upload_id, position)
+                ) WITHOUT ROWID
+            ''')
+            rows = self.conn.execute("SELECT id, mod_list FROM user_uploads").fetchall()
+            self.conn.executemany(_SQL_SAVE_UPLOAD_MOD, [
+                (upload_id, position, int(mod_id))
+                for upload_id, mod_list in rows
+                for position, mod_id in enumerate(_unpack_ids(mod_list))
+            ])
+            self.conn.execute("ALTER TABLE user_uploads DROP COLUMN mod_list")
+        
+        if version < 7:
+            # Sizes move from REAL GB to INTEGER bytes
+            for table, old_column, new_column in (
+                ("mod_cache", "mod_size", "mod_size_bytes"),
+                ("user_uploads", "total_size", "total_size_bytes"),
+                ("active_mod_lists", "total_size_gb", "total_size_bytes"),
+            ):
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {new_column} INTEGER")
+                self.conn.execute(f"UPDATE {table} SET {new_column} = CAST(ROUND({old_column} * 1073741824) AS INTEGER)")
+                self.conn.execute(f"ALTER TABLE {table} DROP COLUMN {old_column}")
+        
+        if version < 8:
+            self.conn.execute("ALTER TABLE active_mod_lists ADD COLUMN html BLOB")
+    
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read-only connection, opening it on first use"""
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            conn.row_factory = sqlite3.Row
+            conn.executescript(f'''
+                PRAGMA query_only=1;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA cache_size=-{PAGE_CACHE_KIB};
+                PRAGMA mmap_size={MMAP_SIZE};
+            ''')
+            self._readers.conn = conn
+            with self._lock:
+                self._reader_conns.append(conn)
+        return conn
+    
+    def close(self):
+        """Finish pending database calls, flush queued writes and close the database connections"""
+        # Waits for calls already handed to the worker threads, reads included
+        self._executor.shutdown(wait=True)
+        # Holding _lock throughout waits out any worker thread still inside a write
+        # transaction (cleanup, VACUUM) and keeps new ones from starting on a closed connection
+        with self._lock:
+            self._flush_queue()
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+            self.conn.close()
     
-    def cache_mod_info(self, mod_id: str, mod_name: str, mod_size: Optional[float] = None):
+    def _queue_write(self, sql: str, params: Tuple):
+        """Defer a write until the next flush; never takes _lock, so it is safe on the event loop"""
+        self._write_queue.append((sql, params))
+    
+    def flush_writes(self):
+        """Apply queued writes in one transaction, batching runs of the same statement"""
+        with self._lock:
+            self._flush_queue()
+    
+    def _flush_queue(self):
+        """Body of flush_writes; callers hold _lock"""
+        # Writers append without the lock, so drain with popleft; anything queued
+        # meanwhile either lands in this batch or stays for the next flush
+        pending = []
+        try:
+            while True:
+                pending.append(self._write_queue.popleft())
+        except IndexError:
+            pass
+        if not pending:
+            return
+        with self._txn():
+            start = 0
+            while start < len(pending):
+                sql = pending[start][0]
+                end = start
+                while end < len(pending) and pending[end][0] == sql:
+                    end += 1
+                self.conn.executemany(sql, [params for _, params in pending[start:end]])
+                start = end
+    
+    def _executemany(self, sql: str, rows: List[Tuple]):
+        """Run one statement for many rows inside a single transaction"""
+        if not rows:
+            return
+        with self._lock, self._txn():
+            self.conn.executemany(sql, rows)
+    
+    def cache_mod_info(self, mod_id: int, mod_name: str, mod_size: Optional[float] = None):
         """Cache mod information"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO mod_cache (mod_id, mod_name, mod_size, last_updated)
-                VALUES (?, ?, ?, ?)
-            ''', (mod_id, mod_name, mod_size, int(time.time())))
-            conn.commit()
-    
-    def get_cached_mod_info(self, mod_id: str) -> Optional[Dict]:
-        """Get cached mod information"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT mod_name, mod_size, last_updated FROM mod_cache
-                WHERE mod_id = ?
-            ''', (mod_id,))
-            
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'mod_name': result[0],
-                    'mod_size': result[1],
-                    'last_updated': result[2]
-                }
-            return None
+        with self._lock:
+            self.conn.execute(_SQL_CACHE_MOD_INFO, (mod_id, mod_name, mod_size))
+        self._forget_mod_rows((mod_id,))
+    
+    def cache_mod_info_many(self, rows: List[Tuple[int, str, Optional[float]]]):
+        """Cache information for many mods at once from (mod_id, mod_name, mod_size) tuples"""
+        self._executemany(_SQL_CACHE_MOD_INFO, rows)
+        self._forget_mod_rows(mod_id for mod_id, _, _ in rows)
+    
+    def _forget_mod_rows(self, mod_ids=None):
+        """Drop mod_ids (or every row when None) from the in-memory LRU after a write"""
+        with self._mod_rows_lock:
+            self._mod_rows_generation += 1
+            if mod_ids is None:
+                self._mod_rows.clear()
+            else:
+                for mod_id in mod_ids:
+                    self._mod_rows.pop(mod_id, None)
+    
+    def _get_mod_row(self, mod_id: int) -> Optional[sqlite3.Row]:
+        """Look up a mod_cache row, serving repeat lookups from memory"""
+        with self._mod_rows_lock:
+            row = self._mod_rows.get(mod_id)
+            if row is not None:
+                self._mod_rows.move_to_end(mod_id)
+                return row
+            generation = self._mod_rows_generation
+        
+        row = self._reader().execute(_SQL_GET_MOD_INFO, (mod_id,)).fetchone()
+        if row is not None:
+            with self._mod_rows_lock:
+                # A write since the read may have changed the row; serve it but don't cache it
+                if self._mod_rows_generation != generation:
+                    return row
+                self._mod_rows[mod_id] = row
+                if len(self._mod_rows) > MOD_CACHE_MEMORY_SIZE:
+                    self._mod_rows.popitem(last=False)
+        return row
+    
+    def _get_mod_rows(self, mod_ids: List[int]) -> Dict[int, sqlite3.Row]:
+        """Look up many mod_cache rows at once, querying only those not already in memory"""
+        found = {}
+        missing = []
+        with self._mod_rows_lock:
+            for mod_id in mod_ids:
+                row = self._mod_rows.get(mod_id)
+                if row is not None:
+                    self._mod_rows.move_to_end(mod_id)
+                    found[mod_id] = row
+                else:
+                    missing.append(mod_id)
+            generation = self._mod_rows_generation
+        
+        if missing:
+            id_array = f"[{','.join(map(str, missing))}]"
+            rows = self._reader().execute(_SQL_GET_MOD_INFOS, (id_array,)).fetchall()
+            with self._mod_rows_lock:
+                # Rows read before a concurrent write are returned but not cached
+                cache_rows = self._mod_rows_generation == generation
+                for row in rows:
+                    found[row['mod_id']] = row
+                    if cache_rows:
+                        self._mod_rows[row['mod_id']] = row
+                while len(self._mod_rows) > MOD_CACHE_MEMORY_SIZE:
+                    self._mod_rows.popitem(last=False)
+        return found
+    
+    def get_cached_mod_info(self, mod_id: int) -> Optional[sqlite3.Row]:
+        """Get cached mod information as a row with mod_name, mod_size and last_updated"""
+        return self._get_mod_row(mod_id)
+    
+    def get_cached_mods_info(self, mod_ids: List[int]) -> Dict[int, sqlite3.Row]:
+        """Get cached rows for many mods in one query; mods not in the cache are left out"""
+        return self._get_mod_rows(mod_ids)
     
     def save_user_upload(self, user_id: str, server_id: str, mod_list: List[str], total_size: float):
         """Save a user's mod list upload"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO user_uploads (user_id, server_id, upload_time, mod_list, total_size)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, server_id, int(time.time()), json.dumps(mod_list), total_size))
-            conn.commit()
+        with self._lock, self._txn():
+            upload_id = self.conn.execute(_SQL_SAVE_USER_UPLOAD, (user_id, server_id, total_size)).lastrowid
+            self.conn.executemany(_SQL_SAVE_UPLOAD_MOD, [
+                (upload_id, position, int(mod_id)) for position, mod_id in enumerate(mod_list)
+            ])
     
     def get_last_upload(self, user_id: str, server_id: str) -> Optional[Dict]:
         """Get the last upload for a user in a specific server"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT mod_list, total_size, upload_time FROM user_uploads
-                WHERE user_id = ? AND server_id = ?
-                ORDER BY upload_time DESC
-                LIMIT 1
-            ''', (user_id, server_id))
-            
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'mod_list': json.loads(result[0]),
-                    'total_size': result[1],
-                    'upload_time': result[2]
-                }
-            return None
-    
-    def save_mod_size(self, mod_id: str, size_gb: float):
+        rows = self._reader().execute(_SQL_GET_LAST_UPLOAD, (user_id, server_id)).fetchall()
+        
+        if rows:
+            return {
+                # A LEFT JOIN row with a NULL mod_id means the upload had no mods
+                'mod_list': [str(row['mod_id']) for row in rows if row['mod_id'] is not None],
+                'total_size': rows[0]['total_size'],
+                'upload_time': rows[0]['upload_time']
+            }
+        return None
+    
+    def save_mod_size(self, mod_id: int, size_gb: float):
         """Save mod size information"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO mod_sizes (mod_id, size_gb, last_updated)
-                VALUES (?, ?, ?)
-            ''', (mod_id, size_gb, int(time.time())))
-            conn.commit()
+        with self._lock:
+            self.conn.execute(_SQL_SAVE_MOD_SIZE, (mod_id, size_gb))
+        self._forget_mod_rows((mod_id,))
+    
+    def save_mod_sizes_many(self, rows: List[Tuple[int, float]]):
+        """Save sizes for many mods at once from (mod_id, size_gb) tuples"""
+        self._executemany(_SQL_SAVE_MOD_SIZE, rows)
+        self._forget_mod_rows(mod_id for mod_id, _ in rows)
     
-    def get_mod_size(self, mod_id: str) -> Optional[float]:
+    def get_mod_size(self, mod_id: int) -> Optional[float]:
         """Get cached mod size"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT size_gb FROM mod_sizes WHERE mod_id = ?
-            ''', (mod_id,))
-            
-            result = cursor.fetchone()
-            return result[0] if result else None
+        result = self._get_mod_row(mod_id)
+        return result['mod_size'] if result else None
+    
+    def get_mod_sizes(self, mod_ids: List[int]) -> Dict[int, Optional[float]]:
+        """Get cached sizes for many mods in one query; mods not in the cache are left out"""
+        return {mod_id: row['mod_size'] for mod_id, row in self._get_mod_rows(mod_ids).items()}
     
     def save_bot_message(self, channel_id: str, message_id: str, user_id: str, server_id: str, message_type: str = "modlist"):
-        """Save a bot message ID for later cleanup"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO bot_messages (channel_id, message_id, user_id, server_id, message_type, created_time)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (channel_id, message_id, user_id, server_id, message_type, int(time.time())))
-            conn.commit()
+        """Queue a bot message ID for later cleanup"""
+        self._queue_write(_SQL_SAVE_BOT_MESSAGE, (channel_id, message_id, user_id, server_id, message_type))
+    
+    def save_bot_messages_many(self, rows: List[Tuple[str, str, str, str, str]]):
+        """Queue many bot message IDs at once from (channel_id, message_id, user_id, server_id, message_type) tuples"""
+        for row in rows:
+            self._queue_write(_SQL_SAVE_BOT_MESSAGE, row)
     
     def get_bot_messages_for_channel(self, channel_id: str, message_type: str = "modlist") -> List[Tuple[str, str]]:
         """Get bot message IDs for a specific channel and type"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT message_id, user_id FROM bot_messages
-                WHERE channel_id = ? AND message_type = ?
-                ORDER BY created_time DESC
-            ''', (channel_id, message_type))
-            
-            return cursor.fetchall()
+        self.flush_writes()
+        return self._reader().execute(_SQL_GET_BOT_MESSAGES, (channel_id, message_type)).fetchall()
     
     def delete_bot_message(self, message_id: str):
-        """Delete a bot message record from the database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM bot_messages WHERE message_id = ?
-            ''', (message_id,))
-            conn.commit()
+        """Queue deletion of a bot message record"""
+        self._queue_write(_SQL_DELETE_BOT_MESSAGE, (message_id,))
+    
+    def delete_bot_messages(self, message_ids: List[str]):
+        """Queue deletion of several bot message records as one run of writes"""
+        for message_id in message_ids:
+            self._queue_write(_SQL_DELETE_BOT_MESSAGE, (message_id,))
     
     def cleanup_old_bot_messages(self, max_age: int = 86400):  # 24 hours default
         """Clean up old bot message records"""
-        cutoff_time = int(time.time()) - max_age
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM bot_messages WHERE created_time < ?
-            ''', (cutoff_time,))
-            conn.commit()
+        self.flush_writes()
+        with self._lock:
+            self.conn.execute(_SQL_CLEANUP_BOT_MESSAGES, (max_age,))
     
     def cleanup_old_cache(self, max_age: int = 2592000):  # 30 days default
         """Clean up old cache entries"""
-        cutoff_time = int(time.time()) - max_age
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM mod_cache WHERE last_updated < ?
-            ''', (cutoff_time,))
-            cursor.execute('''
-                DELETE FROM mod_sizes WHERE last_updated < ?
-            ''', (cutoff_time,))
-            conn.commit()
-    
-    def save_active_mod_list(self, list_id: str, user_id: int, guild_id: Optional[int], mods: List[Dict], download_url: Optional[str]):
-        """Save an active mod list to the database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO active_mod_lists 
-                (list_id, user_id, guild_id, mods, download_url, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+        with self._lock:
+            self.conn.execute(_SQL_CLEANUP_MOD_CACHE, (max_age,))
+            self.conn.execute("PRAGMA optimize")
+        self._forget_mod_rows()
+    
+    def save_active_mod_list(self, list_id: str, user_id: int, guild_id: Optional[int], mods: List[Dict], download_url: Optional[str], html: Optional[Union[bytes, bytearray]] = None):
+        """Save an active mod list to the database, with a compressed copy of its HTML file if given"""
+        mods_count, total_size_gb = _summarize_mods(mods)
+        with self._lock:
+            self.conn.execute(_SQL_SAVE_ACTIVE_MOD_LIST, (
                 list_id,
                 str(user_id),
                 str(guild_id) if guild_id else None,
-                json.dumps(mods),
+                _pack_mods(mods),
                 download_url,
-                int(time.time())
+                mods_count,
+                total_size_gb,
+                zlib.compress(html) if html else None
             ))
-            conn.commit()
+    
+    def get_mod_list_html(self, list_id: str) -> Optional[bytes]:
+        """Get the uploaded HTML file kept with an active mod list, if any"""
+        result = self._reader().execute(_SQL_GET_MOD_LIST_HTML, (list_id,)).fetchone()
+        if result and result['html']:
+            return zlib.decompress(result['html'])
+        return None
     
     def get_active_mod_list(self, list_id: str) -> Optional[Dict]:
         """Get an active mod list from the database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, guild_id, mods, download_url, timestamp
-                FROM active_mod_lists
-                WHERE list_id = ?
-            ''', (list_id,))
-            
-            result = cursor.fetchone()
-            if result:
-                return {
-                    'user_id': int(result[0]),
-                    'guild_id': int(result[1]) if result[1] else None,
-                    'mods': json.loads(result[2]),
-                    'download_url': result[3],
-                    'timestamp': result[4]
-                }
-            return None
+        result = self._reader().execute(_SQL_GET_ACTIVE_MOD_LIST, (list_id,)).fetchone()
+        
+        if result:
+            return {
+                'user_id': int(result['user_id']),
+                'guild_id': int(result['guild_id']) if result['guild_id'] else None,
+                'mods': _unpack_mods(result['mods']),
+                'download_url': result['download_url'],
+                'timestamp': result['timestamp']
+            }
+        return None
     
     def get_recent_mod_list(self, user_id: int, guild_id: Optional[int]) -> Optional[Tuple[str, Dict]]:
         """Get the most recent mod list for a user in a guild"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT list_id, user_id, guild_id, mods, download_url, timestamp
-                FROM active_mod_lists
-                WHERE user_id = ? AND (guild_id = ? OR guild_id IS NULL)
-                ORDER BY timestamp DESC
-                LIMIT 1
-            ''', (str(user_id), str(guild_id) if guild_id else None))
-            
-            result = cursor.fetchone()
-            if result:
-                return (result[0], {
-                    'user_id': int(result[1]),
-                    'guild_id': int(result[2]) if result[2] else None,
-                    'mods': json.loads(result[3]),
-                    'download_url': result[4],
-                    'timestamp': result[5]
-                })
-            return None
+        result = self._reader().execute(_SQL_GET_RECENT_MOD_LIST, (str(user_id), str(guild_id) if guild_id else None)).fetchone()
+        
+        if result:
+            return (result['list_id'], {
+                'user_id': int(result['user_id']),
+                'guild_id': int(result['guild_id']) if result['guild_id'] else None,
+                'mods': _unpack_mods(result['mods']),
+                'download_url': result['download_url'],
+                'timestamp': result['timestamp']
+            })
+        return None
+    
+    def get_recent_mod_list_summary(self, user_id: int, guild_id: Optional[int]) -> Optional[Tuple[str, Dict]]:
+        """Get the most recent mod list's counts for a user in a guild without loading its mods"""
+        result = self._reader().execute(_SQL_GET_RECENT_MOD_LIST_SUMMARY, (str(user_id), str(guild_id) if guild_id else None)).fetchone()
+        
+        if result:
+            return (result['list_id'], {
+                'mods_count': result['mods_count'],
+                'total_size_gb': result['total_size_gb'],
+                'timestamp': result['timestamp']
+            })
+        return None
     
     def cleanup_old_mod_lists(self, max_age: int = 86400):  # 24 hours default
         """Clean up old mod lists"""
-        cutoff_time = int(time.time()) - max_age
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM active_mod_lists WHERE timestamp < ?
-            ''', (cutoff_time,))
-            conn.commit()
+        with self._lock:
+            self.conn.execute(_SQL_CLEANUP_MOD_LISTS, (max_age,))
+    
+    def cleanup_expired(self, mod_list_age: int = 86400, bot_message_age: int = 86400, cache_age: int = 2592000):
+        """Run every cleanup in a single transaction"""
+        self.flush_writes()
+        with self._lock, self._txn():
+            self.conn.execute(_SQL_CLEANUP_MOD_LISTS, (mod_list_age,))
+            self.conn.execute(_SQL_CLEANUP_BOT_MESSAGES, (bot_message_age,))
+            self.conn.execute(_SQL_CLEANUP_MOD_CACHE, (cache_age,))
+        with self._lock:
+            # Refreshes planner statistics only for tables that need it, so it is cheap to run often
+            self.conn.execute("PRAGMA optimize")
+        self._forget_mod_rows()
+    
+    def maintain(self, vacuum: bool = False):
+        """Refresh planner statistics and optionally rebuild the file to reclaim free pages"""
+        self.flush_writes()
+        with self._lock:
+            self.conn.execute("PRAGMA optimize")
+            if vacuum:
+                self.conn.execute("VACUUM")
     
     def refresh_mod_list(self, list_id: str) -> bool:
         """Refresh the timestamp of a mod list to keep it active"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            # First check if the mod list exists
-            cursor.execute('SELECT COUNT(*) FROM active_mod_lists WHERE list_id = ?', (list_id,))
-            if cursor.fetchone()[0] == 0:
-                return False
-                
-            # Update the timestamp
-            cursor.execute('''
-                UPDATE active_mod_lists
-                SET timestamp = ?
-                WHERE list_id = ?
-            ''', (int(time.time()), list_id))
-            conn.commit()
-            return True
\ No newline at end of file
+        with self._lock:
+            # No matching row means the mod list does not exist
+            cursor = self.conn.execute(_SQL_REFRESH_MOD_LIST, (list_id,))
+            return cursor.rowcount > 0
+    
+    def run(self, func, *args, **kwargs):
+        """Run a blocking database call on the database's own worker threads; returns an awaitable"""
+        return asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    # Async variants run the blocking call on one of the database's worker threads,
+    # where _reader() hands it that thread's own read-only connection
+    flush_writes_async = _in_executor(flush_writes)
+    save_user_upload_async = _in_executor(save_user_upload)
+    cache_mod_info_many_async = _in_executor(cache_mod_info_many)
+    refresh_mod_list_async = _in_executor(refresh_mod_list)
+    cleanup_old_bot_messages_async = _in_executor(cleanup_old_bot_messages)
+    get_cached_mod_info_async = _in_executor(get_cached_mod_info)
+    get_cached_mods_info_async = _in_executor(get_cached_mods_info)
+    get_mod_size_async = _in_executor(get_mod_size)
+    get_mod_sizes_async = _in_executor(get_mod_sizes)
+    get_last_upload_async = _in_executor(get_last_upload)
+    get_active_mod_list_async = _in_executor(get_active_mod_list)
+    save_active_mod_list_async = _in_executor(save_active_mod_list)
+    get_mod_list_html_async = _in_executor(get_mod_list_html)
+    get_recent_mod_list_async = _in_executor(get_recent_mod_list)
+    get_recent_mod_list_summary_async = _in_executor(get_recent_mod_list_summary)
@@ -1,18 +1,169 @@
+import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
 import io
+import itertools
+import logging
 import tempfile
 import os
-from typing import Optional
+import signal
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
 import time
 
-from config import DISCORD_TOKEN, BOT_PREFIX, MAX_MODS_PER_PAGE, MESSAGE_DELETE_DELAY, AUTHORIZED_USERS
+from config import DISCORD_TOKEN, BOT_PREFIX, MAX_MODS_PER_PAGE, MESSAGE_DELETE_DELAY, AUTHORIZED_USERS, CDLC_COMPAT_BY_NAME
 from database import ModDatabase
 from steam_workshop import SteamWorkshopAPI
 from mod_analyzer import ModAnalyzer
 
+# Per-upload diagnostics go through logging so they cost nothing unless DEBUG is enabled
+logger = logging.getLogger(__name__)
+
+# Attachments below this size are read in one go; larger ones are streamed
+STREAM_THRESHOLD = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Channels whose last analysis is kept in memory; least recently used ones are dropped
+LAST_ANALYSIS_CACHE_SIZE = 512
+
+# Discord allows up to 10 embeds per message, with at most 6000 characters across all of them
+EMBEDS_PER_MESSAGE = 10
+EMBED_TOTAL_LIMIT = 6000
+
+# Characters per complete-list part. Descriptions may hold 4096, but the 6000 character
+# message cap would then fit only one part per DM; three parts of this size fit in one
+COMPLETE_LIST_PART_LIMIT = 1900
+
+# Uploaded HTML files up to this size are kept with the mod list and sent back as attachments;
+# a launcher export is roughly 300 bytes per mod, so this covers lists of a few thousand mods
+MAX_STORED_HTML = 1024 * 1024
+
+# Mod lists whose complete-list DM embeds are kept ready for repeat requests
+COMPLETE_LIST_CACHE_SIZE = 64
+
+class TokenBucket:
+    """Async rate limiter allowing `rate` acquisitions per `period` seconds, with bursts up to `rate`"""
+    
+    def __init__(self, rate: int, period: float):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+    
+    async def __aenter__(self):
+        await self.acquire()
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+# Paces DMs below Discord's limit so bursts of button clicks don't hit 429 backoff
+DM_LIMIT = TokenBucket(rate=5, period=5.0)
+
+# Reply when a user's privacy settings block DMs from the bot
+DM_FORBIDDEN_MSG = "❌ I cannot send you a private message. Please check your privacy settings."
+
+def format_complete_mod_list(mods: list) -> str:
+    """Format every mod with its size, ID and Steam link for the complete list DM"""
+    parts = ["**Complete Mod List:**\n\n"]
+    for i, mod in enumerate(mods, 1):
+        size_text = f" ({mod['size_gb']:.1f}GB)" if mod.get('size_gb') else ""
+        parts.append(f"{i}. **{mod['name']}**{size_text}\n   ID: {mod['id']} | [Steam Page]({mod['url']})\n\n")
+    return "".join(parts)
+
+def chunk_bounds_by_lines(text: str, limit: int = COMPLETE_LIST_PART_LIMIT) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) bounds of chunks of at most limit characters, split at the last newline that fits"""
+    start = 0
+    length = len(text)
+    while start < length:
+        if length - start <= limit:
+            yield start, length
+            return
+        end = text.rfind('\n', start, start + limit)
+        if end <= start:
+            # No newline to split at, so cut the line itself
+            end = start + limit
+            yield start, end
+            start = end
+        else:
+            yield start, end
+            start = end + 1
+
+# Shared fields of every complete-list part; each part only adds its title and description
+COMPLETE_LIST_EMBED = discord.Embed(color=0x00ff00).to_dict()
+
+def build_complete_list_payloads(mods: list) -> list:
+    """Split the complete mod list into embed dicts, grouped into as few messages as Discord allows"""
+    all_mods_text = format_complete_mod_list(mods).rstrip('\n')
+    bounds = list(chunk_bounds_by_lines(all_mods_text))
+    total = len(bounds)
+    
+    # Pack as many parts into each DM as Discord allows, keeping them in order
+    batch = []
+    batch_chars = 0
+    batches = []
+    for i, (start, end) in enumerate(bounds, 1):
+        title = f"📋 Complete Mod List (Part {i}/{total})" if total > 1 else "📋 Complete Mod List"
+        size = len(title) + end - start
+        if batch and (len(batch) == EMBEDS_PER_MESSAGE or batch_chars + size > EMBED_TOTAL_LIMIT):
+            batches.append(batch)
+            batch = []
+            batch_chars = 0
+        batch.append({**COMPLETE_LIST_EMBED, 'title': title, 'description': all_mods_text[start:end]})
+        batch_chars += size
+    batches.append(batch)
+    return batches
+
+async def dm_or_fail(interaction: discord.Interaction, embeds: list) -> bool:
+    """DM embeds to the interaction's user; if DMs are blocked, say so in the interaction and return False"""
+    try:
+        async with DM_LIMIT:
+            await interaction.user.send(embeds=embeds)
+        return True
+    except discord.Forbidden:
+        await interaction.followup.send(DM_FORBIDDEN_MSG, ephemeral=True)
+        return False
+
+async def send_modlist_file(interaction: discord.Interaction, database: ModDatabase, list_id: str) -> bool:
+    """Send the stored HTML file of a mod list as an ephemeral attachment; returns False if none was kept"""
+    html = await database.get_mod_list_html_async(list_id)
+    if not html:
+        return False
+    await interaction.followup.send(
+        "📥 Here is your mod list HTML file",
+        file=discord.File(io.BytesIO(html), filename="modlist.html"),
+        ephemeral=True
+    )
+    return True
+
+async def send_complete_list(interaction: discord.Interaction, list_id: str, mods: list):
+    """DM the complete mod list to the user, split into parts if it is too long for one embed"""
+    bot = interaction.client
+    if isinstance(bot, ArmaModBot):
+        batches = bot.complete_list_payloads(list_id, mods)
+    else:
+        batches = build_complete_list_payloads(mods)
+    
+    for batch in batches:
+        if not await dm_or_fail(interaction, [discord.Embed.from_dict(payload) for payload in batch]):
+            return
+    
+    await interaction.followup.send("✅ Complete mod list sent to your private messages!", ephemeral=True)
+
 class ArmaModBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
@@ -26,11 +177,46 @@ class ArmaModBot(commands.Bot):
         self.steam_api = SteamWorkshopAPI()
         self.analyzer = ModAnalyzer(self.steam_api, self.database)
         
+        # Source of compact, unique active mod list IDs. Seeding from the start time in
+        # milliseconds keeps IDs from colliding with lists saved before a restart
+        self.list_id_counter = itertools.count(int(time.time() * 1000))
+        
         # Track last mod list analysis per channel (for comparison)
-        self.last_modlist_analysis = {}
+        self.last_modlist_analysis = OrderedDict()
+        
+        # Prebuilt complete-list embed payloads per active mod list, least recently used dropped first
+        self.complete_list_cache = OrderedDict()
+        
+        # HTTP session for streaming large uploads, kept apart from the Steam Workshop client
+        self.attachment_session = None
         
         # Start cleanup task for expired data
         self.cleanup_task = None
+        
+        # Periodically flushes the database write-behind queue
+        self.flush_task = None
+        
+        # Weekly database maintenance (statistics and VACUUM)
+        self.maintenance_task = None
+    
+    def remember_analysis(self, channel_id: str, analysis: dict):
+        """Keep a channel's latest analysis, dropping the least recently used channels"""
+        self.last_modlist_analysis[channel_id] = analysis
+        self.last_modlist_analysis.move_to_end(channel_id)
+        while len(self.last_modlist_analysis) > LAST_ANALYSIS_CACHE_SIZE:
+            self.last_modlist_analysis.popitem(last=False)
+    
+    def complete_list_payloads(self, list_id: str, mods: list) -> list:
+        """Get the complete-list embed payloads for a mod list, building them on first use"""
+        payloads = self.complete_list_cache.get(list_id)
+        if payloads is None:
+            payloads = build_complete_list_payloads(mods)
+            self.complete_list_cache[list_id] = payloads
+            while len(self.complete_list_cache) > COMPLETE_LIST_CACHE_SIZE:
+                self.complete_list_cache.popitem(last=False)
+        else:
+            self.complete_list_cache.move_to_end(list_id)
+        return payloads
     
     async def setup_hook(self):
         """Setup hook for bot initialization"""
@@ -49,6 +235,12 @@ class ArmaModBot(commands.Bot):
         
         # Start cleanup task for expired mod lists
         self.cleanup_task = asyncio.create_task(self.cleanup_expired_mod_lists())
+        
+        # Start flushing queued database writes
+        self.flush_task = asyncio.create_task(self.flush_database_writes())
+        
+        # Start weekly database maintenance
+        self.maintenance_task = asyncio.create_task(self.maintain_database())
     
     async def on_ready(self):
         """Called when bot is ready"""
@@ -64,44 +256,94 @@ class ArmaModBot(commands.Bot):
     
     async def cleanup_expired_mod_lists(self):
         """Cleanup task to remove expired data from database"""
+        failures = 0
         while not self.is_closed():
             try:
-                # Clean up old mod lists (older than 24 hours)
-                self.database.cleanup_old_mod_lists(86400)  # 24 hours
-                
-                # Clean up old bot messages from database (older than 24 hours)
-                self.database.cleanup_old_bot_messages(86400)  # 24 hours
-                
-                # Clean up old cache (older than 30 days)
-                self.database.cleanup_old_cache(2592000)  # 30 days
+                # Clean up old mod lists and bot messages (older than 24 hours)
+                # and old cache (older than 30 days) in one transaction, off the event loop
+                await self.database.run(
+                    self.database.cleanup_expired,
+                    mod_list_age=86400,  # 24 hours
+                    bot_message_age=86400,  # 24 hours
+                    cache_age=2592000  # 30 days
+                )
+                failures = 0
                 
                 # Run cleanup every 5 minutes
                 await asyncio.sleep(300)
                 
             except Exception as e:
                 print(f"Error in cleanup task: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute before retrying
+                # Retry after 1 minute, doubling on each consecutive failure up to 10 minutes
+                delay = min(60 * 2 ** failures, 600)
+                failures += 1
+                await asyncio.sleep(delay)
+    
+    async def flush_database_writes(self):
+        """Flush queued database writes every second"""
+        while not self.is_closed():
+            await asyncio.sleep(1)
+            try:
+                await self.database.flush_writes_async()
+            except Exception as e:
+                print(f"Error flushing database writes: {e}")
+    
+    async def maintain_database(self):
+        """Vacuum the database and refresh its statistics once a week"""
+        while not self.is_closed():
+            await asyncio.sleep(604800)  # 7 days
+            try:
+                # VACUUM rewrites the whole file while holding the write lock, so it runs on a
+                # worker thread; the bot's own writes are queued or threaded and never wait on it
+                await self.database.run(self.database.maintain, True)
+            except Exception as e:
+                print(f"Error in database maintenance: {e}")
     
     async def close(self):
         """Cleanup when bot shuts down"""
-        # Cancel cleanup task
-        if self.cleanup_task:
-            self.cleanup_task.cancel()
-            try:
-                await self.cleanup_task
-            except asyncio.CancelledError:
-                pass
+        # Cancel background tasks; queued writes are flushed by database.close(). Cancelling
+        # doesn't stop a worker thread already running cleanup or VACUUM, so the close runs
+        # on a thread too and waits for the database lock there instead of on the event loop
+        for task in (self.cleanup_task, self.flush_task, self.maintenance_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         
         await self.steam_api.close_session()
+        if self.attachment_session and not self.attachment_session.closed:
+            await self.attachment_session.close()
+        await asyncio.to_thread(self.database.close)
         await super().close()
 
 class ModCommands(commands.Cog):
     def __init__(self, bot: ArmaModBot):
         self.bot = bot
+        
+        # Scheduled message deletions; the event loop only keeps weak references to tasks
+        self._pending_deletes = set()
+        
+        # The help embeds never change, so build them once and send copies from their dict form
+        self._modlist_help_payload = self._build_modlist_help().to_dict()
+        self._bothelp_help_payload = self._build_bothelp_help().to_dict()
+        
+        # /debug handlers by type; each takes the interaction and the optional mod ID
+        self._debug_dispatch = {
+            "modsize": lambda interaction, mod_id: self._debug_modsize(interaction),
+            "dlc": self._debug_dlc,
+            "changes": lambda interaction, mod_id: self._debug_changes(interaction)
+        }
     
     @app_commands.command(name="modlist", description="Show help for mod list analysis")
     async def modlist_slash(self, interaction: discord.Interaction):
         """Show help for modlist commands"""
+        await interaction.response.send_message(embed=discord.Embed.from_dict(self._modlist_help_payload))
+    
+    @staticmethod
+    def _build_modlist_help() -> discord.Embed:
+        """Build the /modlist help embed"""
         embed = discord.Embed(
             title="🎮 Arma 3 Mod Manager",
             description="Upload your Arma 3 mod list HTML file to analyze your mods!",
@@ -134,7 +376,7 @@ class ModCommands(commands.Cog):
         
         embed.set_footer(text="Made for Arma 3 communities")
         
-        await interaction.response.send_message(embed=embed)
+        return embed
     
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -145,9 +387,8 @@ class ModCommands(commands.Cog):
         # Check for HTML file uploads first
         if message.attachments:
             for attachment in message.attachments:
-                if attachment.filename.lower().endswith('.html'):
-                    # Add a small delay to ensure Discord interaction context is ready
-                    await asyncio.sleep(0.1)
+                # Only the extension needs case folding, not the whole filename
+                if attachment.filename[-5:].lower() == '.html':
                     await self.handle_html_upload(message, attachment)
                     return  # Prevents any further processing
         
@@ -158,8 +399,12 @@ class ModCommands(commands.Cog):
         """Handle HTML file upload"""
         print(f"Processing HTML upload from {message.author.name} ({message.author.id})")
         
-        # Check if user is authorized to upload mod lists
+        # Coerce the IDs used for storage and lookups once
         user_id = str(message.author.id)
+        server_id = str(message.guild.id) if message.guild else "DM"
+        channel_id = str(message.channel.id)
+        
+        # Check if user is authorized to upload mod lists
         if AUTHORIZED_USERS and user_id not in AUTHORIZED_USERS:
             error_embed = discord.Embed(
                 title="❌ Access Denied",
@@ -181,80 +426,53 @@ class ModCommands(commands.Cog):
         )
         loading_msg = await message.channel.send(embed=loading_embed)
         try:
-            print(f"Reading HTML file: {attachment.filename}")
-            html_content = await attachment.read()
-            html_text = html_content.decode('utf-8')
-            print(f"HTML file read successfully, size: {len(html_text)} characters")
+            logger.debug("Reading HTML file: %s", attachment.filename)
+            html_content = await self.read_attachment(attachment)
+            logger.debug("HTML file read successfully, size: %d bytes", len(html_content))
             
-            print("Starting mod list analysis...")
+            logger.debug("Starting mod list analysis...")
             # Add timeout to prevent hanging
             analysis = await asyncio.wait_for(
                 self.bot.analyzer.analyze_mod_list(
-                    html_text, 
+                    html_content, 
                     user_id, 
-                    str(message.guild.id) if message.guild else "DM"
+                    server_id
                 ),
                 timeout=60.0  # 60 second timeout
             )
-            print("Mod list analysis completed successfully")
+            logger.debug("Mod list analysis completed successfully")
             analysis['modlist_attachment_url'] = attachment.url
 
-            # Delete previous mod list messages in this channel
-            channel_id = str(message.channel.id)
-            old_messages = self.bot.database.get_bot_messages_for_channel(channel_id, "modlist")
-            old_message_deleted = False
-            
-            for old_msg_id, old_user_id in old_messages:
-                try:
-                    # Only delete messages from the same user or if it's the same channel
-                    if old_user_id == str(message.author.id):
-                        old_msg = await message.channel.fetch_message(int(old_msg_id))
-                        await old_msg.delete()
-                        old_message_deleted = True
-                        # Remove from database
-                        self.bot.database.delete_bot_message(old_msg_id)
-                except Exception as e:
-                    print(f"Could not delete old message {old_msg_id}: {e}")
-                    # Remove from database if message doesn't exist
-                    self.bot.database.delete_bot_message(old_msg_id)
+            # Delete previous mod list messages in this channel while the new analysis is sent
+            delete_task = asyncio.create_task(self.delete_old_modlists(message.channel, user_id))
 
             # Send the new analysis
-            result_msg = await self.send_mod_analysis(message.channel, analysis, message.author)
+            try:
+                result_msg = await self.send_mod_analysis(message.channel, analysis, message.author, html_content)
+            finally:
+                # A failed cleanup must not mask an error from the send or fail a good upload
+                try:
+                    old_message_deleted = await delete_task
+                except Exception as e:
+                    print(f"Error deleting old mod lists: {e}")
+                    old_message_deleted = False
             
             # Save the new message to database
             self.bot.database.save_bot_message(
-                channel_id=str(message.channel.id),
+                channel_id=channel_id,
                 message_id=str(result_msg.id),
-                user_id=str(message.author.id),
-                server_id=str(message.guild.id) if message.guild else "DM",
+                user_id=user_id,
+                server_id=server_id,
                 message_type="modlist"
             )
             
-            self.bot.last_modlist_analysis[channel_id] = analysis
-            await loading_msg.delete()
+            self.bot.remember_analysis(channel_id, analysis)
             
-            # Send private notification if old message was deleted
+            # Remove the loading message and send the private notification together
+            cleanup = [loading_msg.delete()]
             if old_message_deleted:
-                try:
-                    notification_embed = discord.Embed(
-                        title="🗑️ Old Mod List Removed",
-                        description="I've automatically removed the previous mod list message from this channel to keep things organized.",
-                        color=0x0099ff
-                    )
-                    notification_embed.add_field(
-                        name="ℹ️ Why this happened",
-                        value="When you upload a new mod list, I automatically delete the old one to prevent confusion and keep the channel clean.",
-                        inline=False
-                    )
-                    notification_embed.set_footer(text="This message is only visible to you")
-                    
-                    await message.author.send(embed=notification_embed)
-                except discord.Forbidden:
-                    # User has DMs disabled, ignore
-                    pass
-                except Exception as e:
-                    # Log error but don't fail the main operation
-                    print(f"Failed to send deletion notification: {e}")
+                cleanup.append(self.notify_old_modlist_removed(message.author))
+            await asyncio.gather(*cleanup, return_exceptions=True)
         except asyncio.TimeoutError:
             print("Mod list analysis timed out after 60 seconds")
             error_embed = discord.Embed(
@@ -276,198 +494,214 @@ class ModCommands(commands.Cog):
             )
             await loading_msg.edit(embed=error_embed)
 
-    async def send_mod_analysis(self, channel, analysis: dict, user: discord.User | discord.Member):
-        """Send comprehensive mod analysis"""
-        # Create main embed with new title format
-        embed = discord.Embed(
-            title=f"Current Modlist for {channel.guild.name}",
-            description="",  # Remove user mention
-            color=0x00ff00
-        )
+    async def delete_old_modlists(self, channel, user_id: str) -> bool:
+        """Delete a user's previous mod list messages in a channel; returns True if any were deleted"""
+        old_messages = await self.bot.database.run(self.bot.database.get_bot_messages_for_channel, str(channel.id), "modlist")
         
-        # Add Discord icon to the right side (300x300px)
-        if channel.guild.icon:
-            embed.set_thumbnail(url=channel.guild.icon.url)
+        async def delete_one(old_msg_id: str) -> bool:
+            try:
+                # A partial message deletes by ID without fetching the message first
+                await channel.get_partial_message(int(old_msg_id)).delete()
+                return True
+            except Exception as e:
+                print(f"Could not delete old message {old_msg_id}: {e}")
+                return False
         
-        # Add mod count and size using inline fields
-        embed.add_field(
-            name="📊 Total Mods",
-            value=f"**{analysis['total_mods']}**",
-            inline=True
-        )
-        embed.add_field(
-            name="📦 Estimated Size",
-            value=f"**{analysis['size_estimate']['total_size_gb']:.1f}GB**",
-            inline=True
-        )
+        # Only delete messages from the same user
+        old_msg_ids = [old_msg_id for old_msg_id, old_user_id in old_messages if old_user_id == user_id]
+        try:
+            results = await asyncio.gather(*(delete_one(old_msg_id) for old_msg_id in old_msg_ids))
+        finally:
+            # Remove the records together, whether or not the messages still existed
+            self.bot.database.delete_bot_messages(old_msg_ids)
+        return any(results)
+    
+    async def notify_old_modlist_removed(self, user: discord.User | discord.Member):
+        """Tell a user privately that their previous mod list message was removed"""
+        try:
+            notification_embed = discord.Embed(
+                title="🗑️ Old Mod List Removed",
+                description="I've automatically removed the previous mod list message from this channel to keep things organized.",
+                color=0x0099ff
+            )
+            notification_embed.add_field(
+                name="ℹ️ Why this happened",
+                value="When you upload a new mod list, I automatically delete the old one to prevent confusion and keep the channel clean.",
+                inline=False
+            )
+            notification_embed.set_footer(text="This message is only visible to you")
+            
+            async with DM_LIMIT:
+                await user.send(embed=notification_embed)
+        except discord.Forbidden:
+            # User has DMs disabled, ignore
+            pass
+        except Exception as e:
+            # Log error but don't fail the main operation
+            print(f"Failed to send deletion notification: {e}")
+    
+    async def read_attachment(self, attachment: discord.Attachment) -> bytes | bytearray:
+        """Download an attachment's raw bytes, streaming large files into a single buffer"""
+        if attachment.size < STREAM_THRESHOLD:
+            return await attachment.read()
+        
+        if self.bot.attachment_session is None or self.bot.attachment_session.closed:
+            self.bot.attachment_session = aiohttp.ClientSession()
+        content = bytearray()
+        async with self.bot.attachment_session.get(attachment.url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                content += chunk
+        # Hand the buffer on as-is; copying it to bytes would briefly hold the export twice
+        return content
 
-        # Add line break
-        embed.add_field(name="", value="", inline=False)
+    async def send_mod_analysis(self, channel, analysis: dict, user: discord.User | discord.Member, html: Optional[bytes | bytearray] = None):
+        """Send comprehensive mod analysis"""
+        # Collect the embed's fields and build it in one go once everything is known
+        fields = []
+        color = 0x00ff00
+        
+        # Add mod count and size using inline fields
+        fields.append({
+            'name': "📊 Total Mods",
+            'value': f"**{analysis['total_mods']}**",
+            'inline': True
+        })
+        fields.append({
+            'name': "📦 Estimated Size",
+            'value': f"**{analysis['size_estimate']['total_size_gb']:.1f}GB**",
+            'inline': True
+        })
 
         # Add CDLC compatibility check
         compat_info = analysis['compatibility_check']
-        detected_cdlc = compat_info.get('detected_cdlc', [])
-        mods_require_cdlc = compat_info.get('mods_require_cdlc', [])
+        detected_cdlc = set(compat_info.get('detected_cdlc', []))
+        mods_require_cdlc = set(compat_info.get('mods_require_cdlc', []))
         
         # Debug output
-        print(f"DEBUG - Detected CDLC: {detected_cdlc}")
-        print(f"DEBUG - Mods require CDLC: {mods_require_cdlc}")
+        logger.debug("Detected CDLC: %s", detected_cdlc)
+        logger.debug("Mods require CDLC: %s", mods_require_cdlc)
         
         # Handle CDLC detection - unified approach
         if detected_cdlc or mods_require_cdlc:
-            from config import CDLC_COMPAT_MODS
-            
             # Collect all unique CDLC requirements
-            all_cdlc_requirements = set()
-            if detected_cdlc:
-                all_cdlc_requirements.update(detected_cdlc)
-            if mods_require_cdlc:
-                all_cdlc_requirements.update(mods_require_cdlc)
+            all_cdlc_requirements = detected_cdlc | mods_require_cdlc
             
-            compat_text = "**Required CDLC and Compatibility Mods:**\n\n"
+            compat_lines = ["**Required CDLC and Compatibility Mods:**\n"]
             
             # Process each CDLC requirement
             for cdlc_name in sorted(all_cdlc_requirements):
-                # Find the CDLC info from config
-                cdlc_info = None
-                for cdlc_key, info in CDLC_COMPAT_MODS.items():
-                    if info['name'] == cdlc_name:
-                        cdlc_info = info
-                        break
-                
+                cdlc_info = CDLC_COMPAT_BY_NAME.get(cdlc_name)
                 if cdlc_info:
                     # Check if this CDLC is detected (has compat mod) or just required
                     is_detected = cdlc_name in detected_cdlc
                     
                     if is_detected:
                         # CDLC is detected - show compat mod link
-                        compat_text += f"✅ **{cdlc_name}** (Detected)\n"
-                        compat_text += f"• [Compatibility Mod]({cdlc_info['steam_url']})\n\n"
+                        compat_lines.append(f"✅ **{cdlc_name}** (Detected)")
+                        compat_lines.append(f"• [Compatibility Mod]({cdlc_info.steam_url})\n")
                     else:
                         # CDLC is required but not detected - show CDLC link
-                        compat_text += f"⚠️ **{cdlc_name}** (Required)\n"
-                        compat_text += f"• [CDLC Store Page]({cdlc_info['cdlc_url']})\n"
-                        compat_text += f"• [Compatibility Mod]({cdlc_info['steam_url']})\n\n"
+                        compat_lines.append(f"⚠️ **{cdlc_name}** (Required)")
+                        compat_lines.append(f"• [CDLC Store Page]({cdlc_info.cdlc_url})")
+                        compat_lines.append(f"• [Compatibility Mod]({cdlc_info.steam_url})\n")
             
             # Add reminder about activating CDLC
-            if any(cdlc_name not in detected_cdlc for cdlc_name in all_cdlc_requirements):
-                compat_text += "***If you own the CDLC, remember to ***activate it*** before joining the server!***\n\n"
+            if mods_require_cdlc - detected_cdlc:
+                compat_lines.append("***If you own the CDLC, remember to ***activate it*** before joining the server!***\n")
+            
+            compat_text = "\n".join(compat_lines) + "\n"
             
             # Truncate if too long for Discord
             if len(compat_text) > 1024:
                 compat_text = compat_text[:1021] + "..."
             
-            embed.add_field(
-                name="🎮 CDLC Requirements",
-                value=compat_text,
-                inline=False
-            )
+            fields.append({
+                'name': "🎮 CDLC Requirements",
+                'value': compat_text,
+                'inline': False
+            })
         else:
-            embed.add_field(
-                name="🎮 CDLC Requirements",
-                value="No CDLC detected in your mod list.",
-                inline=False
-            )
-
-        # Add line break
-        embed.add_field(name="", value="", inline=False)
+            fields.append({
+                'name': "🎮 CDLC Requirements",
+                'value': "No CDLC detected in your mod list.",
+                'inline': False
+            })
 
         # Add workshop requirements check
         workshop_req = analysis.get('workshop_requirements', {})
         if workshop_req:
             if workshop_req.get('all_requirements_met', True):
-                embed.add_field(
-                    name="✅ Workshop Requirements",
-                    value="🟢 All required workshop dependencies are included",
-                    inline=False
-                )
+                fields.append({
+                    'name': "✅ Workshop Requirements",
+                    'value': "🟢 All required workshop dependencies are included",
+                    'inline': False
+                })
             else:
-                missing_text = ""
-                for missing in workshop_req.get('missing_requirements', [])[:5]:  # Show first 5
-                    missing_text += f"• **{missing['mod_name']}** requires {missing['required_item']}\n"
+                missing_text = "".join(
+                    f"• **{missing['mod_name']}** requires {missing['required_item']}\n"
+                    for missing in workshop_req.get('missing_requirements', [])[:5]  # Show first 5
+                )
                 if len(missing_text) > 1024:
                     missing_text = missing_text[:1021] + "..."
-                embed.add_field(
-                    name="❌ Workshop Requirements",
-                    value=f"🔴 Missing required items:\n{missing_text}",
-                    inline=False
-                )
-                embed.color = 0xff0000  # Red for errors
-
-        # Add line break
-        embed.add_field(name="", value="", inline=False)
+                fields.append({
+                    'name': "❌ Workshop Requirements",
+                    'value': f"🔴 Missing required items:\n{missing_text}",
+                    'inline': False
+                })
+                color = 0xff0000  # Red for errors
 
         # Add changes from previous upload
-        if analysis['comparison'] and analysis['comparison']['has_changes']:
-            changes_text = ""
-            if analysis['comparison']['total_added'] > 0:
-                changes_text += f"➕ **Added:** {analysis['comparison']['total_added']} mods\n"
-            if analysis['comparison']['total_removed'] > 0:
-                changes_text += f"➖ **Removed:** {analysis['comparison']['total_removed']} mods\n"
+        comparison = analysis['comparison']
+        if comparison and comparison['has_changes']:
+            mod_info_map = analysis['mod_info']
+            total_added = comparison['total_added']
+            total_removed = comparison['total_removed']
+            added_mods = comparison['added_mods'] if total_added > 0 else []
+            removed_mods = comparison['removed_mods'] if total_removed > 0 else []
             
-            # Calculate size of added and removed mods
-            added_size = 0.0
-            removed_size = 0.0
-            
-            if analysis['comparison']['total_added'] > 0:
-                added_mods = analysis['comparison']['added_mods']
-                for mod_id in added_mods:
-                    mod_info = analysis['mod_info'].get(mod_id, {})
-                    size = mod_info.get('size_gb', 0)
-                    if size:
-                        added_size += size
+            # Removed mods are not in the current mod_info, so look them all up in the cache at once
+            cached_rows = await self.bot.database.get_cached_mods_info_async([int(mod_id) for mod_id in removed_mods])
+            removed_cached = {mod_id: cached_rows.get(int(mod_id)) for mod_id in removed_mods}
             
-            if analysis['comparison']['total_removed'] > 0:
-                removed_mods = analysis['comparison']['removed_mods']
-                for mod_id in removed_mods:
-                    # Try to get mod size from cache since it's not in current mod_info
-                    cached_mod = self.bot.analyzer.database.get_cached_mod_info(mod_id)
-                    if cached_mod and cached_mod.get('mod_size'):
-                        removed_size += cached_mod['mod_size']
-            
-            # Update the change text to include sizes
-            if analysis['comparison']['total_added'] > 0:
-                changes_text = changes_text.replace(
-                    f"➕ **Added:** {analysis['comparison']['total_added']} mods\n",
-                    f"➕ **Added:** {analysis['comparison']['total_added']} mods | {added_size:.1f}GB\n"
-                )
+            # Calculate size of added and removed mods
+            added_size = sum(mod_info_map.get(mod_id, {}).get('size_gb') or 0 for mod_id in added_mods)
+            removed_size = sum(
+                (cached_mod['mod_size'] or 0) for cached_mod in removed_cached.values() if cached_mod
+            )
             
-            if analysis['comparison']['total_removed'] > 0:
-                changes_text = changes_text.replace(
-                    f"➖ **Removed:** {analysis['comparison']['total_removed']} mods\n",
-                    f"➖ **Removed:** {analysis['comparison']['total_removed']} mods | {removed_size:.1f}GB\n"
-                )
+            changes_lines = []
+            if total_added > 0:
+                changes_lines.append(f"➕ **Added:** {total_added} mods | {added_size:.1f}GB")
+            if total_removed > 0:
+                changes_lines.append(f"➖ **Removed:** {total_removed} mods | {removed_size:.1f}GB")
             
             # Add actual mod names if there are changes (only if 5 or fewer)
-            if analysis['comparison']['total_added'] > 0 and analysis['comparison']['total_added'] <= 5:
-                changes_text += "\n**Added Mods:**\n"
-                added_mods = analysis['comparison']['added_mods']
-                for i, mod_id in enumerate(added_mods):
-                    mod_info = analysis['mod_info'].get(mod_id, {})
+            if 0 < total_added <= 5:
+                changes_lines.append("\n**Added Mods:**")
+                for mod_id in added_mods:
+                    mod_info = mod_info_map.get(mod_id, {})
                     mod_name = mod_info.get('name', f"Mod {mod_id}")
                     size_text = f" ({mod_info.get('size_gb', 0):.1f}GB)" if mod_info.get('size_gb') else ""
-                    changes_text += f"• {mod_name}{size_text}\n"
+                    changes_lines.append(f"• {mod_name}{size_text}")
+            
+            if 0 < total_removed <= 5:
+                changes_lines.append("\n**Removed Mods:**")
+                for mod_id in removed_mods:
+                    cached_mod = removed_cached[mod_id]
+                    mod_name = (cached_mod['mod_name'] if cached_mod else None) or f"Mod {mod_id}"
+                    size_text = f" ({cached_mod['mod_size']:.1f}GB)" if cached_mod and cached_mod['mod_size'] else ""
+                    changes_lines.append(f"• {mod_name}{size_text}")
             
-            if analysis['comparison']['total_removed'] > 0 and analysis['comparison']['total_removed'] <= 5:
-                changes_text += "\n**Removed Mods:**\n"
-                removed_mods = analysis['comparison']['removed_mods']
-                for i, mod_id in enumerate(removed_mods):
-                    # Try to get mod name from cache since it's not in current mod_info
-                    cached_mod = self.bot.analyzer.database.get_cached_mod_info(mod_id)
-                    mod_name = cached_mod.get('mod_name', f"Mod {mod_id}") if cached_mod else f"Mod {mod_id}"
-                    size_text = f" ({cached_mod.get('mod_size', 0):.1f}GB)" if cached_mod and cached_mod.get('mod_size') else ""
-                    changes_text += f"• {mod_name}{size_text}\n"
+            changes_text = "\n".join(changes_lines) + "\n"
             
             if len(changes_text) > 1024:
                 changes_text = changes_text[:1021] + "..."
-            embed.add_field(
-                name="📈 Changes from Last Upload",
-                value=changes_text,
-                inline=False
-            )
-
-        # Add line break
-        embed.add_field(name="", value="", inline=False)
+            fields.append({
+                'name': "📈 Changes from Last Upload",
+                'value': changes_text,
+                'inline': False
+            })
 
         # Format mod list for display - show only 10 mods
         mod_display = self.bot.analyzer.format_mod_list_for_display_3columns(
@@ -482,41 +716,63 @@ class ModCommands(commands.Cog):
         else:
             mod_list_text = mod_display['display_text']
 
-        embed.add_field(
-            name=f"📦 Mod List ({mod_display['displayed_count']}/{mod_display['total_mods']})",
-            value=mod_list_text,
-            inline=False
-        )
+        fields.append({
+            'name': f"📦 Mod List ({mod_display['displayed_count']}/{mod_display['total_mods']})",
+            'value': mod_list_text,
+            'inline': False
+        })
 
         # Store mod list in database for button interactions
-        list_id = f"{user.id}_{int(time.time())}"
-        self.bot.database.save_active_mod_list(
+        list_id = format(next(self.bot.list_id_counter), 'x')
+        await self.bot.database.save_active_mod_list_async(
             list_id=list_id,
             user_id=user.id,
             guild_id=channel.guild.id if channel.guild else None,
             mods=mod_display['all_mods'],
-            download_url=analysis.get('modlist_attachment_url')
+            download_url=analysis.get('modlist_attachment_url'),
+            html=html if html and len(html) <= MAX_STORED_HTML else None
         )
 
         # Create view with buttons
         view = ModListView(list_id, mod_display['total_mods'])
 
+        embed_data = {
+            'title': f"Current Modlist for {channel.guild.name}",
+            'color': color,
+            'fields': fields
+        }
+        # Add Discord icon to the right side (300x300px)
+        if channel.guild.icon:
+            embed_data['thumbnail'] = {'url': channel.guild.icon.url}
+        embed = discord.Embed.from_dict(embed_data)
+
         # Send the embed
         msg = await channel.send(embed=embed, view=view)
 
-        # Auto-delete after delay if in a lobby channel
+        # Auto-delete after delay if in a lobby channel, without holding up the caller
         if 'lobby' in channel.name.lower():
-            await asyncio.sleep(MESSAGE_DELETE_DELAY)
-            try:
-                await msg.delete()
-            except:
-                pass
+            task = asyncio.create_task(self._delayed_delete(msg, MESSAGE_DELETE_DELAY))
+            self._pending_deletes.add(task)
+            task.add_done_callback(self._pending_deletes.discard)
 
         return msg
     
+    async def _delayed_delete(self, msg: discord.Message, delay: float):
+        """Delete a message after a delay, ignoring messages that are already gone"""
+        await asyncio.sleep(delay)
+        try:
+            await msg.delete()
+        except:
+            pass
+    
     @app_commands.command(name="bothelp", description="Show detailed bot help and features")
     async def bothelp_slash(self, interaction: discord.Interaction):
         """Show detailed bot help"""
+        await interaction.response.send_message(embed=discord.Embed.from_dict(self._bothelp_help_payload))
+    
+    @staticmethod
+    def _build_bothelp_help() -> discord.Embed:
+        """Build the /bothelp help embed"""
         embed = discord.Embed(
             title="🤖 LoadmasterBot Help",
             description="Complete guide to using the Arma 3 Mod Manager Discord Bot",
@@ -591,28 +847,27 @@ class ModCommands(commands.Cog):
         
         embed.set_footer(text="LoadmasterBot v2.0 - Made for Arma 3 communities")
         
-        await interaction.response.send_message(embed=embed)
+        return embed
 
     @app_commands.command(name="debug", description="Debug bot functionality")
     @app_commands.describe(
         debug_type="Type of debug: modsize, dlc, or changes",
         mod_id="Mod ID for DLC debug (required for dlc type)"
     )
+    @app_commands.choices(debug_type=[
+        app_commands.Choice(name="modsize", value="modsize"),
+        app_commands.Choice(name="dlc", value="dlc"),
+        app_commands.Choice(name="changes", value="changes")
+    ])
     async def debug_slash(self, interaction: discord.Interaction, debug_type: str, mod_id: str | None = None):
         """Unified debug command for all debug functionality"""
         await interaction.response.defer(ephemeral=True)
         
-        if debug_type.lower() == "modsize":
-            await self._debug_modsize(interaction)
-        elif debug_type.lower() == "dlc":
-            if not mod_id:
-                await interaction.followup.send("❌ Mod ID is required for DLC debug. Use `/debug dlc <mod_id>`", ephemeral=True)
-                return
-            await self._debug_dlc(interaction, mod_id)
-        elif debug_type.lower() == "changes":
-            await self._debug_changes(interaction)
-        else:
+        handler = self._debug_dispatch.get(debug_type)
+        if handler is None:
             await interaction.followup.send("❌ Invalid debug type. Use: `modsize`, `dlc`, or `changes`", ephemeral=True)
+            return
+        await handler(interaction, mod_id)
     
     async def _debug_modsize(self, interaction: discord.Interaction):
         """Debug mod sizes for the last uploaded list"""
@@ -620,7 +875,7 @@ class ModCommands(commands.Cog):
         guild_id = str(interaction.guild.id) if interaction.guild else "DM"
         
         if hasattr(self.bot.analyzer, 'get_last_analysis'):
-            last_analysis = self.bot.analyzer.get_last_analysis(user_id, guild_id)
+            last_analysis = await self.bot.database.run(self.bot.analyzer.get_last_analysis, user_id, guild_id)
         else:
             last_analysis = None
             
@@ -657,8 +912,12 @@ class ModCommands(commands.Cog):
             
         await interaction.followup.send(content, ephemeral=True)
     
-    async def _debug_dlc(self, interaction: discord.Interaction, mod_id: str):
+    async def _debug_dlc(self, interaction: discord.Interaction, mod_id: str | None):
         """Debug DLC requirements for a specific mod"""
+        if not mod_id:
+            await interaction.followup.send("❌ Mod ID is required for DLC debug. Use `/debug dlc <mod_id>`", ephemeral=True)
+            return
+        
         try:
             mod_info = await self.bot.steam_api.get_mod_info(mod_id)
             if mod_info:
@@ -709,7 +968,7 @@ class ModCommands(commands.Cog):
         guild_id = str(interaction.guild.id) if interaction.guild else "DM"
         
         if hasattr(self.bot.analyzer, 'get_last_analysis'):
-            last_analysis = self.bot.analyzer.get_last_analysis(user_id, guild_id)
+            last_analysis = await self.bot.database.run(self.bot.analyzer.get_last_analysis, user_id, guild_id)
         else:
             last_analysis = None
         
@@ -717,7 +976,7 @@ class ModCommands(commands.Cog):
             await interaction.followup.send("No mod list analysis found for you yet.", ephemeral=True)
             return
         
-        last_upload = self.bot.analyzer.database.get_last_upload(user_id, guild_id)
+        last_upload = await self.bot.analyzer.database.get_last_upload_async(user_id, guild_id)
         if not last_upload:
             await interaction.followup.send("No previous upload found for comparison.", ephemeral=True)
             return
@@ -766,16 +1025,8 @@ class ModCommands(commands.Cog):
         user_id = interaction.user.id
         guild_id = interaction.guild.id if interaction.guild else None
         
-        # Find the most recent mod list for this user
-        most_recent = None
-        most_recent_time = 0
-        
-        for list_id, data in self.bot.active_mod_lists.items():
-            if (data.get('user_id') == user_id and 
-                data.get('guild_id') == guild_id and
-                data['timestamp'] > most_recent_time):
-                most_recent = (list_id, data)
-                most_recent_time = data['timestamp']
+        # Find the most recent mod list for this user; only its summary is needed here
+        most_recent = await self.bot.database.get_recent_mod_list_summary_async(user_id, guild_id)
         
         if not most_recent:
             await interaction.followup.send("❌ No recent mod list found. Please upload a new mod list first.", ephemeral=True)
@@ -789,7 +1040,7 @@ class ModCommands(commands.Cog):
             return
         
         # Create new view with fresh buttons
-        view = ModListView(list_id, len(data['mods']))
+        view = ModListView(list_id, data['mods_count'])
         
         embed = discord.Embed(
             title="🔄 Fresh Buttons Generated",
@@ -829,7 +1080,7 @@ class ModCommands(commands.Cog):
         
         try:
             # Clean up old bot messages (older than 1 hour for testing)
-            self.bot.database.cleanup_old_bot_messages(3600)  # 1 hour
+            await self.bot.database.cleanup_old_bot_messages_async(3600)  # 1 hour
             
             embed = discord.Embed(
                 title="🧹 Cleanup Complete",
@@ -858,15 +1109,7 @@ class ModCommands(commands.Cog):
         guild_id = interaction.guild.id if interaction.guild else None
         
         # Find the most recent mod list for this user
-        most_recent = None
-        most_recent_time = 0
-        
-        for list_id, data in self.bot.active_mod_lists.items():
-            if (data.get('user_id') == user_id and 
-                data.get('guild_id') == guild_id and
-                data['timestamp'] > most_recent_time):
-                most_recent = (list_id, data)
-                most_recent_time = data['timestamp']
+        most_recent = await self.bot.database.get_recent_mod_list_async(user_id, guild_id)
         
         if not most_recent:
             await interaction.followup.send("❌ No recent mod list found. Please upload a new mod list first.", ephemeral=True)
@@ -881,40 +1124,7 @@ class ModCommands(commands.Cog):
         
         mods = data['mods']
         
-        # Create a comprehensive mod list
-        all_mods_text = "**Complete Mod List:**\n\n"
-        for i, mod in enumerate(mods, 1):
-            size_text = f" ({mod.get('size_gb', 'Unknown'):.1f}GB)" if mod.get('size_gb') else ""
-            all_mods_text += f"{i}. **{mod['name']}**{size_text}\n"
-            all_mods_text += f"   ID: {mod['id']} | [Steam Page]({mod['url']})\n\n"
-        
-        # Split if too long
-        if len(all_mods_text) > 2000:
-            chunks = [all_mods_text[i:i+1900] for i in range(0, len(all_mods_text), 1900)]
-            for i, chunk in enumerate(chunks):
-                embed = discord.Embed(
-                    title=f"📋 Complete Mod List (Part {i+1}/{len(chunks)})",
-                    description=chunk,
-                    color=0x00ff00
-                )
-                try:
-                    await interaction.user.send(embed=embed)
-                except discord.Forbidden:
-                    await interaction.followup.send("❌ I cannot send you a private message. Please check your privacy settings.", ephemeral=True)
-                    return
-        else:
-            embed = discord.Embed(
-                title="📋 Complete Mod List",
-                description=all_mods_text,
-                color=0x00ff00
-            )
-            try:
-                await interaction.user.send(embed=embed)
-            except discord.Forbidden:
-                await interaction.followup.send("❌ I cannot send you a private message. Please check your privacy settings.", ephemeral=True)
-                return
-        
-        await interaction.followup.send("✅ Complete mod list sent to your private messages!", ephemeral=True)
+        await send_complete_list(interaction, list_id, mods)
 
     @app_commands.command(name="download", description="Get download link for your recent mod list")
     async def download_command(self, interaction: discord.Interaction):
@@ -925,15 +1135,7 @@ class ModCommands(commands.Cog):
         guild_id = interaction.guild.id if interaction.guild else None
         
         # Find the most recent mod list for this user
-        most_recent = None
-        most_recent_time = 0
-        
-        for list_id, data in self.bot.active_mod_lists.items():
-            if (data.get('user_id') == user_id and 
-                data.get('guild_id') == guild_id and
-                data['timestamp'] > most_recent_time):
-                most_recent = (list_id, data)
-                most_recent_time = data['timestamp']
+        most_recent = await self.bot.database.get_recent_mod_list_async(user_id, guild_id)
         
         if not most_recent:
             await interaction.followup.send("❌ No recent mod list found. Please upload a new mod list first.", ephemeral=True)
@@ -946,6 +1148,10 @@ class ModCommands(commands.Cog):
             await interaction.followup.send("❌ Your mod list is too old (more than 24 hours). Please upload a new one.", ephemeral=True)
             return
         
+        # Prefer the stored file; attachment links on Discord's CDN expire
+        if await send_modlist_file(interaction, self.bot.database, list_id):
+            return
+        
         download_url = data.get('download_url')
         if download_url:
             await interaction.followup.send(f"📥 [Download your mod list HTML file]({download_url})", ephemeral=True)
@@ -1008,29 +1214,28 @@ class ModListView(discord.ui.View):
                 return
             
             # Try to get mod list from database first
-            data = bot.database.get_active_mod_list(self.list_id)
+            data = await bot.database.get_active_mod_list_async(self.list_id)
+            list_id = self.list_id
             mods = None
             
             if data:
-                # If the list exists but is old, try to refresh it
+                # If the list exists but is old, refresh it; only its timestamp changes, so no re-read
                 if (time.time() - data['timestamp']) > 86400:  # older than 24 hours
-                    if bot.database.refresh_mod_list(self.list_id):
-                        # Successfully refreshed, get the data again
-                        data = bot.database.get_active_mod_list(self.list_id)
+                    await bot.database.refresh_mod_list_async(self.list_id)
                 mods = data['mods']
             else:
                 # Try to find a recent mod list for this user
                 user_id = interaction.user.id
                 guild_id = interaction.guild.id if interaction.guild else None
-                recent = bot.database.get_recent_mod_list(user_id, guild_id)
+                recent = await bot.database.get_recent_mod_list_async(user_id, guild_id)
                 
                 if recent:
-                    # If found a recent list but it's old, try to refresh it
-                    if (time.time() - recent[1]['timestamp']) > 86400:
-                        if bot.database.refresh_mod_list(recent[0]):
-                            # Successfully refreshed, get the data again
-                            recent = bot.database.get_recent_mod_list(user_id, guild_id)
-                    mods = recent[1]['mods']
+                    recent_id, recent_data = recent
+                    # If found a recent list but it's old, refresh it; only its timestamp changes
+                    if (time.time() - recent_data['timestamp']) > 86400:
+                        await bot.database.refresh_mod_list_async(recent_id)
+                    list_id = recent_id
+                    mods = recent_data['mods']
                 else:
                     await interaction.followup.send("❌ No mod list found. Please upload a new mod list first.", ephemeral=True)
                     return
@@ -1039,40 +1244,7 @@ class ModListView(discord.ui.View):
                 await interaction.followup.send("❌ Mod list not found. Please upload a new mod list first.", ephemeral=True)
                 return
             
-            # Create a comprehensive mod list
-            all_mods_text = "**Complete Mod List:**\n\n"
-            for i, mod in enumerate(mods, 1):
-                size_text = f" ({mod.get('size_gb', 'Unknown'):.1f}GB)" if mod.get('size_gb') else ""
-                all_mods_text += f"{i}. **{mod['name']}**{size_text}\n"
-                all_mods_text += f"   ID: {mod['id']} | [Steam Page]({mod['url']})\n\n"
-            
-            # Split if too long
-            if len(all_mods_text) > 2000:
-                chunks = [all_mods_text[i:i+1900] for i in range(0, len(all_mods_text), 1900)]
-                for i, chunk in enumerate(chunks):
-                    embed = discord.Embed(
-                        title=f"📋 Complete Mod List (Part {i+1}/{len(chunks)})",
-                        description=chunk,
-                        color=0x00ff00
-                    )
-                    try:
-                        await interaction.user.send(embed=embed)
-                    except discord.Forbidden:
-                        await interaction.followup.send("❌ I cannot send you a private message. Please check your privacy settings.", ephemeral=True)
-                        return
-            else:
-                embed = discord.Embed(
-                    title="📋 Complete Mod List",
-                    description=all_mods_text,
-                    color=0x00ff00
-                )
-                try:
-                    await interaction.user.send(embed=embed)
-                except discord.Forbidden:
-                    await interaction.followup.send("❌ I cannot send you a private message. Please check your privacy settings.", ephemeral=True)
-                    return
-            
-            await interaction.followup.send("✅ Complete mod list sent to your private messages!", ephemeral=True)
+            await send_complete_list(interaction, list_id, mods)
             
         except Exception as e:
             print(f"Error in show_all_mods button: {e}")
@@ -1091,48 +1263,57 @@ class ModListView(discord.ui.View):
             # Check if interaction is already responded to
             if interaction.response.is_done():
                 return
+            
+            # Acknowledge right away so the database lookups can't run past the interaction deadline
+            await interaction.response.defer(ephemeral=True)
                 
             # Get the bot instance and cast it properly
             bot = interaction.client
             if not isinstance(bot, ArmaModBot):
-                await interaction.response.send_message("❌ Bot configuration error - wrong bot type.", ephemeral=True)
+                await interaction.followup.send("❌ Bot configuration error - wrong bot type.", ephemeral=True)
                 return
             
             # Try to get mod list from database first
-            data = bot.database.get_active_mod_list(self.list_id)
+            data = await bot.database.get_active_mod_list_async(self.list_id)
+            list_id = None
             download_url = None
             
             if data:
-                # If the list exists but is old, try to refresh it
+                # If the list exists but is old, refresh it; only its timestamp changes, so no re-read
                 if (time.time() - data['timestamp']) > 86400:  # older than 24 hours
-                    if bot.database.refresh_mod_list(self.list_id):
-                        # Successfully refreshed, get the data again
-                        data = bot.database.get_active_mod_list(self.list_id)
+                    await bot.database.refresh_mod_list_async(self.list_id)
+                list_id = self.list_id
                 download_url = data.get('download_url')
             else:
                 # Try to find a recent mod list for this user
                 user_id = interaction.user.id
                 guild_id = interaction.guild.id if interaction.guild else None
-                recent = bot.database.get_recent_mod_list(user_id, guild_id)
+                recent = await bot.database.get_recent_mod_list_async(user_id, guild_id)
                 
                 if recent:
-                    # If found a recent list but it's old, try to refresh it
-                    if (time.time() - recent[1]['timestamp']) > 86400:
-                        if bot.database.refresh_mod_list(recent[0]):
-                            # Successfully refreshed, get the data again
-                            recent = bot.database.get_recent_mod_list(user_id, guild_id)
-                    download_url = recent[1].get('download_url')
+                    recent_id, recent_data = recent
+                    # If found a recent list but it's old, refresh it; only its timestamp changes
+                    if (time.time() - recent_data['timestamp']) > 86400:
+                        await bot.database.refresh_mod_list_async(recent_id)
+                    list_id = recent_id
+                    download_url = recent_data.get('download_url')
+            
+            # Prefer the stored file; attachment links on Discord's CDN expire
+            if list_id and await send_modlist_file(interaction, bot.database, list_id):
+                return
             
             if download_url:
-                await interaction.response.send_message(f"📥 [Download your mod list HTML file]({download_url})", ephemeral=True)
+                await interaction.followup.send(f"📥 [Download your mod list HTML file]({download_url})", ephemeral=True)
             else:
-                await interaction.response.send_message("❌ Download link not available. Please upload a new mod list first.", ephemeral=True)
+                await interaction.followup.send("❌ Download link not available. Please upload a new mod list first.", ephemeral=True)
                 
         except Exception as e:
             print(f"Error in download_modlist button: {e}")
             try:
                 if not interaction.response.is_done():
                     await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
+                else:
+                    await interaction.followup.send(f"❌ An error occurred: {str(e)}", ephemeral=True)
             except:
                 pass
     
@@ -1179,16 +1360,42 @@ async def main():
     """Main function to run the bot"""
     bot = ArmaModBot()
     
+    # Stop cleanly on SIGINT/SIGTERM by closing the bot from inside the running loop
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+        except NotImplementedError:
+            # Windows event loops have no signal handlers; Ctrl+C still raises KeyboardInterrupt there
+            pass
+    
+    bot_task = None
     try:
         if not DISCORD_TOKEN:
             raise ValueError("DISCORD_TOKEN environment variable is not set")
-        await bot.start(DISCORD_TOKEN)
+        bot_task = asyncio.create_task(bot.start(DISCORD_TOKEN))
+        await asyncio.wait((bot_task, stop), return_when=asyncio.FIRST_COMPLETED)
+        if stop.done():
+            print("Bot stopped by signal")
+        else:
+            # Surface any error that ended the bot on its own
+            bot_task.result()
     except KeyboardInterrupt:
         print("Bot stopped by user")
     except Exception as e:
         print(f"Error running bot: {e}")
     finally:
         await bot.close()
+        if bot_task is not None:
+            # Let start() unwind now that the connection is closed
+            await asyncio.gather(bot_task, return_exceptions=True)
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    # uvloop is optional; it is a faster drop-in event loop where available (not on Windows)
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main()) 
\ No newline at end of file
@@ -1,8 +1,16 @@
-from typing import List, Dict, Set, Tuple
-from config import CDLC_COMPAT_MODS
+import asyncio
+from typing import List, Dict, Set, Tuple, Union
+from config import CDLC_COMPAT_MODS, REQUIRED_MOD_TO_KEY
 from steam_workshop import SteamWorkshopAPI
 from database import ModDatabase
 
+# Each CDLC's display name with its lowercase form and keywords, worked out once for matching
+_CDLC_NAMES = tuple(
+    (entry.name, entry.name.lower(), tuple(entry.name.lower().split()))
+    for entry in CDLC_COMPAT_MODS.values()
+)
+_CDLC_BY_LOWER_NAME = {lower: name for name, lower, _ in _CDLC_NAMES}
+
 class ModAnalyzer:
     def __init__(self, steam_api: SteamWorkshopAPI, database: ModDatabase):
         self.steam_api = steam_api
@@ -16,52 +24,48 @@ class ModAnalyzer:
         """Check if any mods require CDLC."""
         detected_cdlc = []
         mods_require_cdlc = []
-        mod_set = set(mod_ids)
 
         # Check if any CDLC mods are present
-        for cdlc_key, cdlc_info in CDLC_COMPAT_MODS.items():
-            cdlc_mods_present = any(str(mod_id) in mod_set for mod_id in cdlc_info['required_mods'])
-            if cdlc_mods_present:
-                detected_cdlc.append(cdlc_info['name'])
+        for mod_id in mod_ids:
+            cdlc_key = REQUIRED_MOD_TO_KEY.get(int(mod_id))
+            if cdlc_key:
+                cdlc_name = CDLC_COMPAT_MODS[cdlc_key].name
+                if cdlc_name not in detected_cdlc:
+                    detected_cdlc.append(cdlc_name)
 
         # Check if any mods require CDLC (by name, description, or required_items)
         if mod_info:
             for mod in mod_info.values():
                 # Check mod name and description for CDLC references
-                for cdlc_key, cdlc_info in CDLC_COMPAT_MODS.items():
-                    cdlc_name = cdlc_info['name'].lower()
-                    if cdlc_name in mod['name'].lower() or (mod.get('description') and cdlc_name in mod['description'].lower()):
-                        if cdlc_info['name'] not in detected_cdlc:
-                            mods_require_cdlc.append(cdlc_info['name'])
+                mod_name_lower = mod['name'].lower()
+                description_lower = mod['description'].lower() if mod.get('description') else None
+                for name, cdlc_name, _ in _CDLC_NAMES:
+                    if cdlc_name in mod_name_lower or (description_lower and cdlc_name in description_lower):
+                        if name not in detected_cdlc:
+                            mods_require_cdlc.append(name)
                 
                 # Check required_items for CDLC names
                 required_items = mod.get('required_items', [])
                 for required in required_items:
                     if not required.isdigit():  # It's a CDLC name, not a mod ID
                         required_lower = required.lower()
-                        for cdlc_key, cdlc_info in CDLC_COMPAT_MODS.items():
-                            cdlc_name = cdlc_info['name'].lower()
+                        required_keywords = required_lower.split()
+                        for name, cdlc_name, cdlc_keywords in _CDLC_NAMES:
                             if (required_lower in cdlc_name or 
                                 cdlc_name in required_lower or
-                                any(keyword in cdlc_name for keyword in required_lower.split()) or
-                                any(keyword in required_lower for keyword in cdlc_name.split())):
-                                if cdlc_info['name'] not in detected_cdlc and cdlc_info['name'] not in mods_require_cdlc:
-                                    mods_require_cdlc.append(cdlc_info['name'])
+                                any(keyword in cdlc_name for keyword in required_keywords) or
+                                any(keyword in required_lower for keyword in cdlc_keywords)):
+                                if name not in detected_cdlc and name not in mods_require_cdlc:
+                                    mods_require_cdlc.append(name)
                 
                 # Check enhanced DLC requirements
+                # Required and optional DLC both count (optional as a potential requirement);
+                # they are stored lowercase, so look each one up by name
                 dlc_requirements = mod.get('dlc_requirements', {})
-                for cdlc_key, cdlc_info in CDLC_COMPAT_MODS.items():
-                    cdlc_name = cdlc_info['name'].lower()
-                    
-                    # Check required DLC
-                    if cdlc_name in dlc_requirements.get('required', []):
-                        if cdlc_info['name'] not in detected_cdlc and cdlc_info['name'] not in mods_require_cdlc:
-                            mods_require_cdlc.append(cdlc_info['name'])
-                    
-                    # Check optional DLC (treat as potential requirement)
-                    elif cdlc_name in dlc_requirements.get('optional', []):
-                        if cdlc_info['name'] not in detected_cdlc and cdlc_info['name'] not in mods_require_cdlc:
-                            mods_require_cdlc.append(cdlc_info['name'])
+                for dlc in (*dlc_requirements.get('required', []), *dlc_requirements.get('optional', [])):
+                    name = _CDLC_BY_LOWER_NAME.get(dlc)
+                    if name and name not in detected_cdlc and name not in mods_require_cdlc:
+                        mods_require_cdlc.append(name)
 
         return {
             'detected_cdlc': detected_cdlc,
@@ -102,22 +106,20 @@ class ModAnalyzer:
         
         added_mods = list(current_set - previous_set)
         removed_mods = list(previous_set - current_set)
-        unchanged_mods = list(current_set & previous_set)
         
         return {
             'added_mods': added_mods,
             'removed_mods': removed_mods,
-            'unchanged_mods': unchanged_mods,
             'total_added': len(added_mods),
             'total_removed': len(removed_mods),
-            'total_unchanged': len(unchanged_mods),
+            'total_unchanged': len(current_set) - len(added_mods),
             'has_changes': len(added_mods) > 0 or len(removed_mods) > 0
         }
     
-    async def analyze_mod_list(self, html_content: str, user_id: str, server_id: str) -> Dict:
+    async def analyze_mod_list(self, html_content: Union[str, bytes, bytearray], user_id: str, server_id: str) -> Dict:
         """Complete analysis of a mod list"""
-        # Parse mod IDs from HTML
-        mod_ids = self.steam_api.parse_html_modlist(html_content)
+        # Parse mod IDs from HTML on a worker thread so large files don't stall the event loop
+        mod_ids = await asyncio.to_thread(self.steam_api.parse_html_modlist, html_content)
         
         # Get mod information
         mod_info = await self.steam_api.get_multiple_mod_info(mod_ids)
@@ -129,25 +131,22 @@ class ModAnalyzer:
         workshop_requirements = self.check_workshop_requirements(mod_info)
         
         # Get previous upload for comparison
-        last_upload = self.database.get_last_upload(user_id, server_id)
+        last_upload = await self.database.get_last_upload_async(user_id, server_id)
         comparison = None
         if last_upload:
             comparison = self.compare_mod_lists(mod_ids, last_upload['mod_list'])
         
         # Estimate total size
-        size_estimate = await self.steam_api.estimate_total_size(mod_ids)
+        size_estimate = await self.steam_api.estimate_total_size(mod_ids, mod_info)
         
         # Save to database
-        self.database.save_user_upload(user_id, server_id, mod_ids, size_estimate['total_size_gb'])
+        await self.database.save_user_upload_async(user_id, server_id, mod_ids, size_estimate['total_size_gb'])
         
-        # Cache mod information
-        for mod_id, info in mod_info.items():
-            size_gb = info.get('size_gb')
-            if size_gb is not None:
-                self.database.cache_mod_info(mod_id, info['name'], size_gb)
-                self.database.save_mod_size(mod_id, size_gb)
-            else:
-                self.database.cache_mod_info(mod_id, info['name'], 0.0)
+        # Cache mod names and sizes in one batch (unknown sizes are stored as NULL)
+        await self.database.cache_mod_info_many_async([
+            (int(mod_id), info['name'], info.get('size_gb'))
+            for mod_id, info in mod_info.items()
+        ])
         
         return {
             'mod_ids': mod_ids,
@@ -228,18 +227,20 @@ class ModAnalyzer:
         display_mods = mod_list[:max_display]
         remaining_mods = mod_list[max_display:] if len(mod_list) > max_display else []
         
-        # Format display text as a clean list
-        display_text = ""
+        # Format display text as a clean list, joined once
+        lines = []
         for i, mod in enumerate(display_mods, 1):
             name = mod['name']
-            size_text = f"{mod.get('size_gb', 'Unknown'):.1f}GB" if mod.get('size_gb') else "Unknown"
+            size_gb = mod.get('size_gb')
+            size_text = f"{size_gb:.1f}GB" if size_gb else "Unknown"
             # Truncate very long names
             if len(name) > 50:
                 name = name[:47] + "..."
-            display_text += f"{i:2d}. **{name}** ({size_text})\n"
+            lines.append(f"{i:2d}. **{name}** ({size_text})\n")
         
         if remaining_mods:
-            display_text += f"\n... and {len(remaining_mods)} more mods"
+            lines.append(f"\n... and {len(remaining_mods)} more mods")
+        display_text = "".join(lines)
         
         return {
             'display_text': display_text,
@@ -258,8 +259,9 @@ class ModAnalyzer:
         # Synchronously get mod info for debug (assume this is for debug, not production)
         # In production, this should be async, but for debug command, we can use cached info
         mod_info = {}
+        cached_rows = self.database.get_cached_mods_info([int(mod_id) for mod_id in mod_ids])
         for mod_id in mod_ids:
-            cached = self.database.get_cached_mod_info(mod_id)
+            cached = cached_rows.get(int(mod_id))
             if cached:
                 mod_info[mod_id] = {
                     'id': mod_id,
@@ -1,16 +1,21 @@
 import aiohttp
 import asyncio
 import re
+import sys
 from bs4 import BeautifulSoup
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
 import time
 from config import STEAM_WORKSHOP_BASE_URL, STEAM_API_BASE_URL, KNOWN_MOD_SIZES
 
+# Upper bound on workshop page requests in flight at once
+MAX_CONCURRENT_REQUESTS = 10
+
 class SteamWorkshopAPI:
     def __init__(self):
         self.session = None
         self.cache = {}
         self.cache_duration = 86400  # 24 hours
+        self.request_semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
     
     async def get_session(self):
         """Get or create aiohttp session"""
@@ -25,7 +30,8 @@ class SteamWorkshopAPI:
     
     def extract_mod_id_from_url(self, url: str) -> Optional[str]:
         """Extract mod ID from Steam Workshop URL"""
-        pattern = r'filedetails/\?id=(\d+)'
+        # Steam Workshop IDs are 64-bit; longer digit runs are not mod IDs
+        pattern = r'filedetails/\?id=(\d{1,18})(?!\d)'
         match = re.search(pattern, url)
         return match.group(1) if match else None
     
@@ -35,56 +41,63 @@ class SteamWorkshopAPI:
         cache_key = f"mod_{mod_id}"
         if cache_key in self.cache:
             cached_data, timestamp = self.cache[cache_key]
-            if time.time() - timestamp < self.cache_duration:
+            if time.monotonic() - timestamp < self.cache_duration:
                 return cached_data
         
         session = await self.get_session()
         url = f"{STEAM_WORKSHOP_BASE_URL}{mod_id}"
         
         try:
-            async with session.get(url) as response:
+            async with self.request_semaphore, session.get(url) as response:
                 if response.status == 200:
                     html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Extract mod name
-                    title_elem = soup.find('div', class_='workshopItemTitle')
-                    mod_name = title_elem.get_text(strip=True) if title_elem else f"Mod {mod_id}"
-                    
-                    # Extract mod size from workshop page first, then description
-                    mod_size = self.extract_file_size_from_workshop(soup)
-                    if mod_size is None:
-                        mod_size = self.extract_mod_size_from_description(soup)
-                    
-                    # If not found in description, try to get from known sizes
-                    if mod_size is None:
-                        mod_size = KNOWN_MOD_SIZES.get(mod_id)
-                    
-                    # Extract required items and DLC requirements
-                    required_items = self.extract_required_items(soup)
-                    dlc_requirements = self.extract_dlc_requirements(soup)
-                    
-                    mod_info = {
-                        'id': mod_id,
-                        'name': mod_name,
-                        'size_gb': mod_size,
-                        'url': url,
-                        'required_items': required_items,
-                        'dlc_requirements': dlc_requirements
-                    }
-                    
-                    # Cache the result
-                    self.cache[cache_key] = (mod_info, time.time())
-                    
-                    return mod_info
                 else:
                     print(f"Failed to fetch mod {mod_id}: HTTP {response.status}")
                     return None
+            
+            # Parsing a workshop page is CPU-bound, so keep it off the event loop
+            mod_info = await asyncio.to_thread(self.parse_mod_page, mod_id, url, html)
+            
+            # Cache the result; the in-memory TTL uses the monotonic clock so wall-clock jumps can't skew it
+            self.cache[cache_key] = (mod_info, time.monotonic())
+            
+            return mod_info
                     
         except Exception as e:
             print(f"Error fetching mod {mod_id}: {e}")
             return None
     
+    def parse_mod_page(self, mod_id: str, url: str, html: str) -> Dict:
+        """Extract mod information from a Steam Workshop page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract mod name
+        title_elem = soup.find('div', class_='workshopItemTitle')
+        # Interned so every upload and cached analysis listing this mod shares one string
+        mod_name = sys.intern(title_elem.get_text(strip=True) if title_elem else f"Mod {mod_id}")
+        
+        # Extract mod size from workshop page first, then description
+        mod_size = self.extract_file_size_from_workshop(soup)
+        if mod_size is None:
+            mod_size = self.extract_mod_size_from_description(soup)
+        
+        # If not found in description, try to get from known sizes
+        if mod_size is None:
+            mod_size = KNOWN_MOD_SIZES.get(int(mod_id))
+        
+        # Extract required items and DLC requirements
+        required_items = self.extract_required_items(soup)
+        dlc_requirements = self.extract_dlc_requirements(soup)
+        
+        return {
+            'id': mod_id,
+            'name': mod_name,
+            'size_gb': mod_size,
+            'url': url,
+            'required_items': required_items,
+            'dlc_requirements': dlc_requirements
+        }
+    
     def extract_mod_size_from_description(self, soup: BeautifulSoup) -> Optional[float]:
         """Extract mod size from Steam Workshop page description"""
         # Look for size patterns in the description
@@ -309,15 +322,18 @@ class SteamWorkshopAPI:
                 mod_info_dict[mod_ids[i]] = {
                     'id': mod_ids[i],
                     'name': f"Mod {mod_ids[i]}",
-                    'size_gb': KNOWN_MOD_SIZES.get(mod_ids[i]),
+                    'size_gb': KNOWN_MOD_SIZES.get(int(mod_ids[i])),
                     'url': f"{STEAM_WORKSHOP_BASE_URL}{mod_ids[i]}"
                 }
         
         return mod_info_dict
     
-    def parse_html_modlist(self, html_content: str) -> List[str]:
-        """Parse HTML content to extract mod IDs"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+    def parse_html_modlist(self, html_content: Union[str, bytes, bytearray]) -> List[str]:
+        """Parse HTML content to extract mod IDs; raw bytes are decoded by the parser as UTF-8"""
+        if isinstance(html_content, (bytes, bytearray)):
+            soup = BeautifulSoup(html_content, 'html.parser', from_encoding='utf-8')
+        else:
+            soup = BeautifulSoup(html_content, 'html.parser')
         mod_ids = []
         
         # Look for Steam Workshop links
@@ -326,22 +342,23 @@ class SteamWorkshopAPI:
             href = link['href']
             mod_id = self.extract_mod_id_from_url(href)
             if mod_id and mod_id not in mod_ids:
-                mod_ids.append(mod_id)
+                mod_ids.append(sys.intern(mod_id))
         
         # Also look for mod ID patterns in text
         text_content = soup.get_text()
-        id_pattern = r'(\d{9,})'  # Steam Workshop IDs are typically 9+ digits
+        id_pattern = r'(?<!\d)(\d{9,18})(?!\d)'  # Steam Workshop IDs are typically 9+ digits
         matches = re.findall(id_pattern, text_content)
         
         for match in matches:
             if match not in mod_ids:
-                mod_ids.append(match)
+                mod_ids.append(sys.intern(match))
         
         return mod_ids
     
-    async def estimate_total_size(self, mod_ids: List[str]) -> Dict:
-        """Estimate total size of mod list"""
-        mod_info = await self.get_multiple_mod_info(mod_ids)
+    async def estimate_total_size(self, mod_ids: List[str], mod_info: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Estimate total size of mod list, reusing already fetched mod info when given"""
+        if mod_info is None:
+            mod_info = await self.get_multiple_mod_info(mod_ids)
         
         total_size = 0.0
         known_sizes = 0
@@ -46,6 +46,12 @@ async def test_steam_workshop():
     mod_ids = steam_api.parse_html_modlist(SAMPLE_HTML)
     print(f"✅ HTML parsing found {len(mod_ids)} mod IDs: {mod_ids}")
     
+    # Test parsing raw uploaded bytes
+    byte_ids = steam_api.parse_html_modlist(SAMPLE_HTML.encode('utf-8'))
+    print(f"✅ Byte HTML parsing matches: {byte_ids == mod_ids}")
+    buffer_ids = steam_api.parse_html_modlist(bytearray(SAMPLE_HTML.encode('utf-8')))
+    print(f"✅ Streamed buffer parsing matches: {buffer_ids == mod_ids}")
+    
     # Test mod info fetching (with mock data)
     print("✅ Steam Workshop API tests passed")
     
@@ -59,17 +65,53 @@ def test_database():
     db = ModDatabase("test_arma_mods.db")
     
     # Test mod caching
-    db.cache_mod_info("123456789", "Test Mod", 1.5)
-    cached_info = db.get_cached_mod_info("123456789")
+    db.cache_mod_info(123456789, "Test Mod", 1.5)
+    cached_info = db.get_cached_mod_info(123456789)
     print(f"✅ Mod caching: {cached_info['mod_name'] if cached_info else 'Failed'}")
     
+    # Test rewriting a cached mod replaces the in-memory copy
+    db.cache_mod_info(123456789, "Renamed Mod", 1.5)
+    cached_info = db.get_cached_mod_info(123456789)
+    print(f"✅ Mod cache invalidation: {cached_info['mod_name'] if cached_info else 'Failed'}")
+    
+    # Test an unknown size does not clobber a known one
+    db.cache_mod_info(123456789, "Renamed Mod", None)
+    print(f"✅ Known size kept: {db.get_mod_size(123456789)} GB")
+    
+    # Test batch mod caching
+    db.cache_mod_info_many([(111111111, "Batch Mod 1", 0.5), (222222222, "Batch Mod 2", None)])
+    batch_info = db.get_cached_mod_info(222222222)
+    print(f"✅ Batch mod caching: {batch_info['mod_name'] if batch_info else 'Failed'}")
+    
+    # Test bulk size lookup
+    sizes = db.get_mod_sizes([111111111, 222222222, 333333333])
+    print(f"✅ Bulk size lookup: {len(sizes)} cached mods found")
+    
+    # Test bulk mod info lookup
+    rows = db.get_cached_mods_info([123456789, 111111111, 333333333])
+    print(f"✅ Bulk mod info lookup: {', '.join(row['mod_name'] for row in rows.values())}")
+    
     # Test user uploads
     test_mods = ["123456789", "987654321"]
     db.save_user_upload("test_user", "test_server", test_mods, 3.0)
     last_upload = db.get_last_upload("test_user", "test_server")
     print(f"✅ User uploads: {len(last_upload['mod_list']) if last_upload else 0} mods saved")
     
+    # Test the uploaded HTML file is kept with an active mod list
+    db.save_active_mod_list("test_list", 1, 2, [], None, SAMPLE_HTML.encode('utf-8'))
+    stored_html = db.get_mod_list_html("test_list")
+    print(f"✅ Stored mod list HTML: {len(stored_html) if stored_html else 0} bytes")
+    
+    # Test queued bot message writes are visible to reads
+    db.save_bot_message("test_channel", "test_message", "test_user", "test_server")
+    bot_messages = db.get_bot_messages_for_channel("test_channel")
+    print(f"✅ Queued bot messages: {len(bot_messages)} saved")
+    db.delete_bot_messages(["test_message"])
+    bot_messages = db.get_bot_messages_for_channel("test_channel")
+    print(f"✅ Batched bot message deletes: {len(bot_messages)} left")
+    
     # Cleanup test database
+    db.close()
     try:
         os.remove("test_arma_mods.db")
     except:
@@ -108,6 +150,7 @@ async def test_mod_analyzer():
     print(f"✅ Mod list formatting: {display['total_mods']} total mods")
     
     await steam_api.close_session()
+    db.close()
     
     # Cleanup test database
     try:
@@ -138,6 +181,7 @@ async def test_integration():
     print(f"   - Changes detected: {analysis['comparison']['has_changes'] if analysis['comparison'] else False}")
     
     await steam_api.close_session()
+    db.close()
     
     # Cleanup test database
     try: